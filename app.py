@@ -1,29 +1,50 @@
 import streamlit as st
-import pandas as pd
-import joblib
-import numpy as np
-
-# Load model and dataset
-model = joblib.load("scripts/models/catboost_podium_model.pkl")
-dataset = pd.read_csv("f1_master_dataset.csv")
-
-# Driver image and team logo maps (example)
-driver_images = {
-    "Max Verstappen": "https://upload.wikimedia.org/wikipedia/commons/3/3e/Max_Verstappen_2023.jpg",
-    "Lewis Hamilton": "https://upload.wikimedia.org/wikipedia/commons/8/86/Lewis_Hamilton_2023.jpg",
-    "Charles Leclerc": "https://upload.wikimedia.org/wikipedia/commons/3/34/Charles_Leclerc_2023.jpg",
-    # Add more drivers as needed
-}
-
-constructor_logos = {
-    "Red Bull": "https://upload.wikimedia.org/wikipedia/en/0/01/Red_Bull_Racing_logo.svg",
-    "Mercedes": "https://upload.wikimedia.org/wikipedia/commons/5/58/Mercedes-Benz_star_2022.svg",
-    "Ferrari": "https://upload.wikimedia.org/wikipedia/en/d/d2/Scuderia_Ferrari_Logo.svg",
-    # Add more constructors as needed
-}
+import time
+from dataset_store import MODEL_FEATURES, load_dataset, build_race_index
+from season_simulator import simulate_championship
+from tree_model import load_serving_model
+from explanations import load_explanations, explain
+from prediction_store import model_fingerprint, race_feature_hashes, load_predictions, lookup, rank_top_n
+from assets import asset_data_uri
+from scenarios import WEATHER_VARIANTS, GRID_SLOTS, run_sweep, sensitivity_table, sensitivity_summary, what_if
+
+# Load model and dataset once per process, shared by every session
+@st.cache_resource
+def load_model():
+    return load_serving_model()
+
+@st.cache_resource
+def load_race_data():
+    dataset = load_dataset()
+    rounds_by_year, race_slices = build_race_index(dataset)
+    return dataset, rounds_by_year, race_slices
+
+@st.cache_resource
+def load_explanation_store():
+    return load_explanations(fingerprint=model_fingerprint())
+
+@st.cache_resource
+def load_prediction_store():
+    predictions, prediction_index = load_predictions()
+    return predictions, prediction_index, model_fingerprint(), race_feature_hashes(dataset)
+
+model = load_model()
+dataset, rounds_by_year, race_slices = load_race_data()
+explanations, explanation_index = load_explanation_store()
+predictions, prediction_index, fingerprint, race_hashes = load_prediction_store()
+
+@st.cache_data
+def run_championship_simulation(year, from_round, n_sims):
+    return simulate_championship(model, dataset, year, from_round, n_sims, seed=0)
+
+@st.cache_data
+def run_what_if(year, round_num, driver, grid, weather):
+    # Keyed on the scenario inputs, so reruns from unrelated widgets reuse the result
+    race_df = dataset.iloc[race_slices[(year, round_num)]]
+    return what_if(model, race_df, {driver: {"grid": grid}}, weather)
 
 # Extend year range to include 2025
-all_years = sorted(dataset['year'].unique().tolist() + [2025], reverse=True)
+all_years = sorted(set(rounds_by_year) | {2025}, reverse=True)
 
 # Theme styling
 st.markdown("""
@@ -60,38 +81,37 @@ col1, col2 = st.columns(2)
 with col1:
     selected_year = st.selectbox("Select Year", all_years)
 with col2:
-    rounds_available = sorted(dataset[dataset['year'] == selected_year]['round'].unique()) if selected_year in dataset['year'].values else list(range(1, 24))
+    rounds_available = rounds_by_year.get(selected_year, list(range(1, 24)))
     selected_round = st.selectbox("Select Round", rounds_available)
 
-# Filter race data
-race_df = dataset[(dataset['year'] == selected_year) & (dataset['round'] == selected_round)]
+# Look up race data (copy so the cached dataset is never mutated)
+race_slice = race_slices.get((selected_year, selected_round))
+race_df = dataset.iloc[race_slice].copy() if race_slice is not None else dataset.iloc[0:0]
 
 if race_df.empty:
     st.warning("No historical race data available for this selection.")
     st.stop()
 
-# Predict
+# Predict: historical races come straight from the materialized store
 if st.button("🚦 Predict Podium"):
     with st.spinner("Predicting podium finishers..."):
-        features = [
-            'year', 'round', 'grid', 'qualifying_position', 'dnf', 'pit_stops',
-            'temperature', 'humidity', 'wind_speed', 'precipitation',
-            'driver_podiums', 'constructor_podiums', 'driver_wins', 'constructor_wins'
-        ]
-        X = race_df[features]
-        preds = model.predict(X)
-        race_df['podium_pred'] = preds
-
-        podium_df = race_df[race_df['podium_pred'] == 1].sort_values(by='qualifying_position').head(3)
+        podium_df = lookup(predictions, prediction_index, selected_year, selected_round,
+                           fingerprint, race_hashes.get((selected_year, selected_round)))
+        if podium_df is None:
+            probabilities = model.predict_proba(race_df[MODEL_FEATURES])[:, 1]
+            podium_df = rank_top_n(race_df, probabilities)
 
         if len(podium_df) < 3:
             st.error(f"Only {len(podium_df)} podium finishers predicted. Try tuning or adding more data.")
         else:
             st.success("🏁 Predicted Podium")
             podium_icons = ['🥇', '🥈', '🥉']
+            driver_ids = dict(zip(race_df['driver'], race_df['driver_id'])) if 'driver_id' in race_df else {}
+            constructor_ids = dict(zip(race_df['constructor'], race_df['constructor_id'])) if 'constructor_id' in race_df else {}
             for i, row in podium_df.reset_index(drop=True).iterrows():
-                driver_img = driver_images.get(row['driver'], f"https://via.placeholder.com/80x80?text={row['driver'].split()[-1]}")
-                constructor_logo = constructor_logos.get(row['constructor'], f"https://via.placeholder.com/100x40?text={row['constructor'].split()[0]}")
+                # Thumbnails are inlined from the local asset store, never hot-linked
+                driver_img = asset_data_uri("driver", driver_ids.get(row['driver']), row['driver'])
+                constructor_logo = asset_data_uri("constructor", constructor_ids.get(row['constructor']), row['constructor'])
 
                 st.markdown(f"""
                     <div class='podium-card'>
@@ -100,6 +120,69 @@ if st.button("🚦 Predict Podium"):
                         <strong>{row['driver']}</strong><br>
                         <img src="{constructor_logo}" alt="team logo" style="margin: 10px 0; max-height: 50px;"><br>
                         <em>{row['constructor']}</em><br>
+                        Podium probability: {row['probability']:.0%}<br>
                         Qualifying: {row['qualifying_position']} | Grid: {row['grid']}
                     </div>
                 """, unsafe_allow_html=True)
+
+# Precomputed SHAP explanations, never computed at request time
+st.markdown("---")
+st.subheader("🔍 Why This Driver?")
+if explanations is None:
+    st.info("No precomputed explanations for the current model. Run `python explanations.py` to generate them.")
+else:
+    explained_driver = st.selectbox("Select Driver", race_df['driver'].astype(str).tolist())
+    contributions = explain(explanations, explanation_index, selected_year, selected_round, explained_driver)
+    if contributions is None:
+        st.warning("No explanation stored for this driver and race.")
+    else:
+        st.markdown("Contribution of each feature to the podium log-odds (positive pushes towards the podium).")
+        st.bar_chart(contributions.rename("contribution"))
+
+# What-if scenarios, every variant of the race scored in one batched call
+st.markdown("---")
+st.subheader("🧪 What-If Scenarios")
+race_drivers = race_df['driver'].astype(str).tolist()
+wi_col1, wi_col2, wi_col3 = st.columns(3)
+with wi_col1:
+    wi_driver = st.selectbox("Driver", race_drivers, key="what_if_driver")
+with wi_col2:
+    recorded_grid = int(race_df.loc[race_df['driver'].astype(str) == wi_driver, 'grid'].iloc[0])
+    wi_grid = st.number_input("Starting Grid", min_value=1, max_value=26, value=max(recorded_grid, 1))
+with wi_col3:
+    wi_weather = st.selectbox("Weather", list(WEATHER_VARIANTS), key="what_if_weather")
+
+scenario_df = run_what_if(selected_year, selected_round, wi_driver, int(wi_grid), wi_weather)
+st.dataframe(scenario_df.head(10), hide_index=True)
+
+sweep_weather = st.multiselect("Sweep Weather Variants", list(WEATHER_VARIANTS), default=list(WEATHER_VARIANTS))
+if st.button("📈 Sweep Grid Positions") and sweep_weather:
+    started = time.perf_counter()
+    sweep = run_sweep(model, race_df, GRID_SLOTS, tuple(sweep_weather))
+    st.caption(f"Scored {len(sweep):,} scenarios in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    st.markdown("**Podium probability at the recorded grid slot, by weather**")
+    st.dataframe(sensitivity_summary(sweep, race_df), column_config={"actual_grid": st.column_config.NumberColumn(format="%d")})
+    for weather_name in sweep_weather:
+        with st.expander(f"Grid sensitivity: {weather_name}"):
+            st.dataframe(sensitivity_table(sweep, weather_name))
+
+# Championship simulator
+st.markdown("---")
+st.subheader("🏆 Championship Simulator")
+sim_col1, sim_col2 = st.columns(2)
+with sim_col1:
+    sim_from_round = st.selectbox("Simulate From Round", rounds_available)
+with sim_col2:
+    n_sims = st.select_slider("Simulated Seasons", options=[1_000, 10_000, 100_000], value=10_000)
+
+if st.button("🎲 Simulate Championship"):
+    with st.spinner(f"Simulating {n_sims:,} seasons..."):
+        driver_table, constructor_table = run_championship_simulation(selected_year, sim_from_round, n_sims)
+
+    st.markdown(f"**Drivers' Championship {selected_year}**")
+    st.dataframe(driver_table[["driver", "championship_probability", "expected_points", "expected_podiums"]].head(10), hide_index=True)
+    st.markdown(f"**Constructors' Championship {selected_year}**")
+    st.dataframe(constructor_table.head(10), hide_index=True)
+    with st.expander("Podium probability by round"):
+        st.dataframe(driver_table.drop(columns=["championship_probability", "expected_points", "expected_podiums"]), hide_index=True)
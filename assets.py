@@ -0,0 +1,193 @@
+import argparse
+import base64
+import hashlib
+import io
+import os
+import re
+import unicodedata
+from functools import lru_cache
+
+import requests
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+
+from dataset_store import ROOT_DIR
+from metrics import metrics
+
+ASSETS_DIR = os.path.join(ROOT_DIR, "data", "assets")
+KINDS = ("driver", "constructor")
+# Stored at twice the displayed size so cards stay sharp on high-DPI screens
+SIZES = {"driver": (160, 160), "constructor": (200, 80)}
+USER_AGENT = "f1-podium-predictor/1.0 (asset cache)"
+
+# Source images keyed by Ergast ID; Wikimedia thumbnails keep downloads small and render SVG logos as PNG
+SOURCES = {
+    "driver": {
+        "max_verstappen": ("Max Verstappen", "https://upload.wikimedia.org/wikipedia/commons/thumb/3/3e/Max_Verstappen_2023.jpg/320px-Max_Verstappen_2023.jpg"),
+        "hamilton": ("Lewis Hamilton", "https://upload.wikimedia.org/wikipedia/commons/thumb/8/86/Lewis_Hamilton_2023.jpg/320px-Lewis_Hamilton_2023.jpg"),
+        "leclerc": ("Charles Leclerc", "https://upload.wikimedia.org/wikipedia/commons/thumb/3/34/Charles_Leclerc_2023.jpg/320px-Charles_Leclerc_2023.jpg"),
+        # Add more drivers as needed
+    },
+    "constructor": {
+        "red_bull": ("Red Bull", "https://upload.wikimedia.org/wikipedia/en/thumb/0/01/Red_Bull_Racing_logo.svg/400px-Red_Bull_Racing_logo.svg.png"),
+        "mercedes": ("Mercedes", "https://upload.wikimedia.org/wikipedia/commons/thumb/5/58/Mercedes-Benz_star_2022.svg/400px-Mercedes-Benz_star_2022.svg.png"),
+        "ferrari": ("Ferrari", "https://upload.wikimedia.org/wikipedia/en/thumb/d/d2/Scuderia_Ferrari_Logo.svg/400px-Scuderia_Ferrari_Logo.svg.png"),
+        # Add more constructors as needed
+    }
+}
+
+
+def slugify(name):
+    ascii_name = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "_", ascii_name.lower()).strip("_") or "unknown"
+
+
+def asset_key(kind, entity_id=None, name=None):
+    # Ergast ID when the dataset has one, otherwise a known source by name, otherwise a slug
+    if entity_id is not None and str(entity_id) not in ("", "nan", "None"):
+        return slugify(entity_id)
+    for key, (source_name, _) in SOURCES[kind].items():
+        if source_name == name:
+            return key
+    return slugify(name)
+
+
+def asset_path(kind, key, assets_dir=ASSETS_DIR):
+    return os.path.join(assets_dir, f"{kind}s", f"{key}.png")
+
+
+def resize(image, kind):
+    size = SIZES[kind]
+    if kind == "driver":
+        # Square crop biased towards the top, where the face usually is
+        return ImageOps.fit(image.convert("RGB"), size, Image.LANCZOS, centering=(0.5, 0.3))
+    image = image.convert("RGBA")
+    image.thumbnail(size, Image.LANCZOS)
+    canvas = Image.new("RGBA", size, (0, 0, 0, 0))
+    canvas.paste(image, ((size[0] - image.width) // 2, (size[1] - image.height) // 2), image)
+    return canvas
+
+
+def load_font(size):
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        # Pillow < 10.1 only ships the fixed-size bitmap font
+        return ImageFont.load_default()
+
+
+def placeholder(kind, key, label):
+    """Deterministic stand-in: initials on a circle for drivers, the team name on a badge."""
+    width, height = SIZES[kind]
+    hue = int(hashlib.md5(key.encode("utf-8")).hexdigest()[:6], 16)
+    color = (64 + hue % 160, 64 + (hue >> 8) % 160, 64 + (hue >> 16) % 160, 255)
+    image = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+
+    words = str(label or key).replace("_", " ").split()
+    if kind == "driver":
+        draw.ellipse((0, 0, width - 1, height - 1), fill=color)
+        text = "".join(word[0] for word in words[:1] + words[-1:]).upper() if words else "?"
+        font = load_font(height // 3)
+    else:
+        draw.rounded_rectangle((0, 0, width - 1, height - 1), radius=height // 5, fill=color)
+        text = " ".join(words) or "?"
+        # Shrink the full team name until it fits inside the badge
+        for font_size in range(height // 3, 9, -2):
+            font = load_font(font_size)
+            if draw.textlength(text, font=font) <= width * 0.9:
+                break
+    draw.text((width / 2, height / 2), text, fill=(255, 255, 255, 255), font=font, anchor="mm")
+    return image
+
+
+def to_png(image):
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def write_asset(image, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(to_png(image))
+    os.replace(tmp_path, path)
+
+
+def download_image(url, timeout=20):
+    response = requests.get(url, headers={"User-Agent": USER_AGENT}, timeout=timeout)
+    response.raise_for_status()
+    return Image.open(io.BytesIO(response.content))
+
+
+def build_assets(entities, assets_dir=ASSETS_DIR, force=False):
+    """Writes a thumbnail for every (kind, key, label), falling back to a placeholder.
+
+    Returns counts of downloaded, generated and skipped assets.
+    """
+    counts = {"downloaded": 0, "placeholders": 0, "skipped": 0}
+    for kind, key, label in entities:
+        path = asset_path(kind, key, assets_dir)
+        if os.path.exists(path) and not force:
+            counts["skipped"] += 1
+            continue
+
+        image = None
+        source = SOURCES[kind].get(key)
+        if source is not None:
+            try:
+                image = resize(download_image(source[1]), kind)
+                counts["downloaded"] += 1
+            except Exception as e:
+                metrics.inc("swallowed_errors_total", site="asset_download")
+                print(f"⚠️ Could not download {kind} image for {key}: {e}")
+        if image is None:
+            image = placeholder(kind, key, label)
+            counts["placeholders"] += 1
+        write_asset(image, path)
+    return counts
+
+
+@lru_cache(maxsize=512)
+def asset_bytes(kind, key, label=None, assets_dir=ASSETS_DIR):
+    path = asset_path(kind, key, assets_dir)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read()
+    return to_png(placeholder(kind, key, label))
+
+
+@lru_cache(maxsize=512)
+def asset_data_uri(kind, entity_id=None, name=None):
+    # Inlined into the page, so rendering a card needs no extra request at all
+    key = asset_key(kind, entity_id, name)
+    encoded = base64.b64encode(asset_bytes(kind, key, name)).decode("ascii")
+    return f"data:image/png;base64,{encoded}"
+
+
+def dataset_entities(dataset):
+    entities = []
+    for kind in KINDS:
+        id_column = f"{kind}_id"
+        columns = [kind] + ([id_column] if id_column in dataset.columns else [])
+        for _, row in dataset[columns].astype(str).drop_duplicates().iterrows():
+            entities.append((kind, asset_key(kind, row.get(id_column), row[kind]), row[kind]))
+    return list(dict.fromkeys(entities))
+
+
+def main():
+    from dataset_store import load_dataset
+
+    parser = argparse.ArgumentParser(description="Build local driver thumbnails and team logos")
+    parser.add_argument("--out", default=ASSETS_DIR)
+    parser.add_argument("--force", action="store_true", help="rebuild assets that already exist")
+    args = parser.parse_args()
+
+    entities = dataset_entities(load_dataset())
+    counts = build_assets(entities, args.out, args.force)
+    print(f"✅ {len(entities)} assets in {args.out}: {counts['downloaded']} downloaded, "
+          f"{counts['placeholders']} placeholders, {counts['skipped']} already present")
+
+
+if __name__ == "__main__":
+    main()
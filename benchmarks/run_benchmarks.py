@@ -0,0 +1,248 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+WORK_DIR = tempfile.mkdtemp(prefix="f1-bench-")
+
+# Everything runs offline: the HTTP layer only replays the fixtures written below
+os.environ["F1_HTTP_MODE"] = "replay"
+os.environ["F1_HTTP_CACHE_DIR"] = os.path.join(WORK_DIR, "http")
+sys.path.insert(0, ROOT_DIR)
+
+import joblib
+import numpy as np
+import pandas as pd
+from catboost import CatBoostClassifier
+
+import http_cache
+import ingest
+import pipeline
+from dataset_store import CSV_PATH, MODEL_FEATURES, load_dataset, write_dataset, build_race_index
+from tree_model import ObliviousTreeModel, NPZ_PATH
+
+MODEL_PATH = os.path.join(ROOT_DIR, "scripts", "models", "catboost_podium_model.pkl")
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, "results", "latest.json")
+
+
+def write_pages(url, races, key, page_size):
+    # Ergast paginates over the inner rows, splitting races across pages
+    rows = [(race, item) for race in races for item in race[key]]
+    for offset in range(0, max(len(rows), 1), page_size):
+        page = []
+        for race, item in rows[offset:offset + page_size]:
+            if not page or page[-1]["round"] != race["round"]:
+                page.append({**{k: v for k, v in race.items() if k != key}, key: []})
+            page[-1][key].append(item)
+        http_cache.write_cached(f"{url}?limit={page_size}&offset={offset}", json.dumps({"MRData": {
+            "total": str(len(rows)), "limit": str(page_size), "offset": str(offset), "RaceTable": {"Races": page}
+        }}))
+
+
+def write_fixtures(dataset):
+    """Records Ergast-shaped responses for every race in the dataset."""
+    base_url = ingest.BASE_URL
+    for year, season in dataset.groupby("year"):
+        races, qualifying = [], []
+        for round_num, rows in season.groupby("round"):
+            first = rows.iloc[0]
+            race = {
+                "round": str(round_num),
+                "date": first["date"],
+                "Circuit": {"circuitName": first["circuit"],
+                            "Location": {"locality": first["location"], "country": first["country"]}}
+            }
+            results, grid = [], []
+            for _, row in rows.iterrows():
+                given, _, family = str(row["driver"]).partition(" ")
+                driver = {"driverId": str(row["driver"]).lower().replace(" ", "_"),
+                          "givenName": given, "familyName": family}
+                results.append({
+                    "Driver": driver,
+                    "Constructor": {"name": row["constructor"]},
+                    "position": str(int(row["position"])) if pd.notna(row["position"]) else "R",
+                    "grid": str(row["grid"]),
+                    "status": "Retired" if str(row["dnf"]) == "True" else "Finished"
+                })
+                if row["qualifying_position"] > 0:
+                    grid.append({"Driver": driver, "position": str(int(row["qualifying_position"]))})
+            races.append({**race, "Results": results})
+            qualifying.append({**race, "QualifyingResults": grid})
+            if year >= ingest.PIT_STOP_FIRST_SEASON:
+                write_pages(f"{base_url}/{year}/{round_num}/pitstops.json", [{**race, "PitStops": []}],
+                            "PitStops", ingest.PAGE_SIZE)
+
+        write_pages(f"{base_url}/{year}/results.json", races, "Results", ingest.PAGE_SIZE)
+        write_pages(f"{base_url}/{year}/qualifying.json", qualifying, "QualifyingResults", ingest.PAGE_SIZE)
+
+
+def write_weather_store(dataset, path):
+    store = dataset[["circuit", "date"] + pipeline.WEATHER_COLUMNS].drop_duplicates(["circuit", "date"])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    store.to_csv(path, index=False)
+
+
+def timed(fn, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return timings, result
+
+
+def summarize(timings, **extra):
+    summary = {
+        "runs": len(timings),
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "mean_s": statistics.fmean(timings)
+    }
+    summary.update(extra)
+    return summary
+
+
+def run_benchmarks(repeat, years, train_iterations):
+    dataset = pd.read_csv(CSV_PATH)
+    dataset = dataset[dataset["year"].isin(years)].reset_index(drop=True)
+    model = joblib.load(MODEL_PATH)
+    results = {}
+
+    write_fixtures(dataset)
+    os.chdir(WORK_DIR)
+    write_weather_store(dataset, os.path.join(WORK_DIR, "cache", "weather_store.csv"))
+
+    timings, race_results = timed(lambda: pipeline.fetch_race_results(years[0], years[-1]), repeat)
+    results["fetch_race_results"] = summarize(timings, rows=len(race_results))
+
+    weather_lookup = pipeline.build_weather_store(race_results, pipeline.get_circuit_coordinates())
+    rows = [row for _, row in race_results.iterrows()]
+    timings, _ = timed(lambda: [pipeline.enrich_row(row, weather_lookup) for row in rows], repeat)
+    results["enrich_row"] = summarize(timings, rows=len(rows),
+                                      rows_per_s=len(rows) / statistics.median(timings))
+
+    dataset_path = os.path.join(WORK_DIR, "dataset.parquet")
+    timings, built = timed(
+        lambda: pipeline.build_master_dataset(years[0], years[-1], incremental=False, dataset_path=dataset_path,
+                                               with_laps=False),
+        repeat
+    )
+    results["build_master_dataset"] = summarize(timings, rows=len(built),
+                                                rows_per_s=len(built) / statistics.median(timings))
+
+    timings, _ = timed(lambda: pd.read_csv(CSV_PATH), repeat)
+    results["load_csv"] = summarize(timings)
+    write_dataset(pd.read_csv(CSV_PATH), dataset_path)
+    timings, _ = timed(lambda: load_dataset(path=dataset_path), repeat)
+    results["load_parquet"] = summarize(timings)
+    timings, _ = timed(lambda: load_dataset(columns=MODEL_FEATURES, years=[years[-1]], path=dataset_path), repeat)
+    results["load_parquet_season_features"] = summarize(timings)
+
+    full = load_dataset(path=dataset_path).dropna(subset=["position"])
+    X, y = full[MODEL_FEATURES], (full["position"] <= 3).astype(int)
+    timings, _ = timed(lambda: CatBoostClassifier(iterations=train_iterations, depth=6, learning_rate=0.05,
+                                                  verbose=False, allow_writing_files=False,
+                                                  random_seed=42).fit(X, y), repeat)
+    results["catboost_train"] = summarize(timings, rows=len(X), iterations=train_iterations)
+
+    _, race_slices = build_race_index(full.reset_index(drop=True))
+    race_X = full.reset_index(drop=True)[MODEL_FEATURES].iloc[next(iter(race_slices.values()))]
+    timings, _ = timed(lambda: model.predict_proba(race_X), max(repeat, 50))
+    results["predict_single_race"] = summarize(timings, rows=len(race_X),
+                                               p95_s=float(np.percentile(timings, 95)))
+    numpy_model = ObliviousTreeModel.load(NPZ_PATH)
+    timings, _ = timed(lambda: numpy_model.predict_proba(race_X), max(repeat, 50))
+    results["predict_single_race_numpy"] = summarize(timings, rows=len(race_X),
+                                                     p95_s=float(np.percentile(timings, 95)))
+
+    season_X = full[full["year"] == full["year"].max()][MODEL_FEATURES]
+    timings, _ = timed(lambda: model.predict_proba(season_X), max(repeat, 10))
+    results["predict_full_season"] = summarize(timings, rows=len(season_X),
+                                               rows_per_s=len(season_X) / statistics.median(timings))
+    return results
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    print(f"\n{'benchmark':<32}{'median':>12}{'baseline':>12}{'ratio':>8}")
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            print(f"{name:<32}{result['median_s']:>11.4f}s{'-':>12}{'-':>8}")
+            continue
+        ratio = result["median_s"] / base["median_s"] if base["median_s"] else float("inf")
+        result["baseline_median_s"] = base["median_s"]
+        result["ratio"] = ratio
+        flag = " ⚠️" if ratio > threshold else ""
+        print(f"{name:<32}{result['median_s']:>11.4f}s{base['median_s']:>11.4f}s{ratio:>8.2f}{flag}")
+        if ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for ingestion, features, training and inference")
+    parser.add_argument("--start-year", type=int, default=2000)
+    parser.add_argument("--end-year", type=int, default=2023)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--train-iterations", type=int, default=200)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=1.2, help="median ratio above which a benchmark counts as a regression")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    try:
+        years = list(range(args.start_year, args.end_year + 1))
+        results = run_benchmarks(args.repeat, years, args.train_iterations)
+    finally:
+        os.chdir(ROOT_DIR)
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "years": [args.start_year, args.end_year],
+            "repeat": args.repeat
+        },
+        "results": results,
+        "regressions": regressions
+    }
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Results saved to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"📌 Baseline updated at {args.baseline}")
+
+    if regressions:
+        print(f"⚠️ Regressions: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
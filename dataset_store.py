@@ -0,0 +1,111 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+CSV_PATH = os.path.join(ROOT_DIR, "f1_master_dataset.csv")
+DATASET_PATH = os.path.join(ROOT_DIR, "data", "f1_master_dataset.parquet")
+
+CATEGORY_COLUMNS = [
+    "driver", "constructor", "circuit", "location", "country",
+    "driver_id", "constructor_id", "circuit_id"
+]
+FLOAT_COLUMNS = ["temperature", "humidity", "wind_speed", "precipitation"]
+MODEL_FEATURES = [
+    "year", "round", "grid", "qualifying_position", "dnf", "pit_stops",
+    "temperature", "humidity", "wind_speed", "precipitation",
+    "driver_podiums", "constructor_podiums", "driver_wins", "constructor_wins",
+    "driver_last5_avg_finish", "driver_circuit_races", "driver_circuit_podiums",
+    "driver_circuit_avg_finish", "teammate_grid_delta"
+]
+
+
+def optimize_dtypes(df):
+    df = df.copy()
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+
+    if "dnf" in df.columns and df["dnf"].dtype != bool:
+        df["dnf"] = df["dnf"].astype(str).str.lower().eq("true")
+
+    for col in df.columns:
+        if col in CATEGORY_COLUMNS or col == "dnf":
+            continue
+        if col in FLOAT_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float32")
+        elif pd.api.types.is_integer_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast="integer")
+        elif pd.api.types.is_float_dtype(df[col]) and df[col].dropna().mod(1).eq(0).all():
+            # Integer columns with gaps (e.g. position for DNFs) become nullable ints
+            df[col] = df[col].astype("Int16")
+    return df
+
+
+def write_dataset(df, path=DATASET_PATH):
+    """Writes one Parquet file sorted by year and round, with one row group per season.
+
+    Season filters skip whole row groups on read, and readers get rows in race order without sorting.
+    """
+    df = optimize_dtypes(df.sort_values(["year", "round"], kind="stable").reset_index(drop=True))
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    years = df["year"].to_numpy()
+    boundaries = np.flatnonzero(np.diff(years)) + 1
+    starts = np.concatenate([[0], boundaries])
+    ends = np.concatenate([boundaries, [len(df)]])
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with pq.ParquetWriter(tmp_path, table.schema) as writer:
+        for start, end in zip(starts, ends):
+            writer.write_table(table.slice(start, end - start))
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_dataset(columns=None, years=None, path=DATASET_PATH, csv_path=CSV_PATH):
+    if os.path.exists(path):
+        with pq.ParquetFile(path, memory_map=True) as parquet:
+            groups = list(range(parquet.num_row_groups))
+            if years is not None:
+                # write_dataset puts exactly one season in each row group
+                wanted = {int(year) for year in years}
+                year_index = parquet.schema_arrow.get_field_index("year")
+                groups = [i for i in groups
+                          if parquet.metadata.row_group(i).column(year_index).statistics.min in wanted]
+            return parquet.read_row_groups(groups, columns=columns).to_pandas()
+
+    df = optimize_dtypes(pd.read_csv(csv_path))
+    if years is not None:
+        df = df[df["year"].isin(years)]
+    df = df.sort_values(["year", "round"], kind="stable")
+    if columns:
+        df = df[columns]
+    return df.reset_index(drop=True)
+
+
+def build_race_index(df):
+    # Maps year -> sorted rounds and (year, round) -> row slice; df must be sorted by year, round
+    keys = df[["year", "round"]].to_numpy()
+    if len(keys) == 0:
+        return {}, {}
+    boundaries = np.flatnonzero((np.diff(keys, axis=0) != 0).any(axis=1)) + 1
+    starts = np.concatenate([[0], boundaries])
+    ends = np.concatenate([boundaries, [len(keys)]])
+
+    race_slices = {}
+    rounds_by_year = {}
+    for (year, round_num), start, end in zip(keys[starts], starts, ends):
+        race_slices[(int(year), int(round_num))] = slice(int(start), int(end))
+        rounds_by_year.setdefault(int(year), []).append(int(round_num))
+    for rounds in rounds_by_year.values():
+        rounds.sort()
+    return rounds_by_year, race_slices
+
+
+if __name__ == "__main__":
+    path = write_dataset(pd.read_csv(CSV_PATH))
+    print(f"✅ Wrote Parquet dataset to {path}")
@@ -0,0 +1,257 @@
+import argparse
+import io
+import os
+import sqlite3
+import time
+import zipfile
+from contextlib import closing
+
+import pandas as pd
+from tqdm import tqdm
+
+from dataset_store import ROOT_DIR
+from ingest import RESULT_COLUMNS
+
+STORE_PATH = os.path.join(ROOT_DIR, "data", "ergast.sqlite")
+
+# Tables of the Ergast CSV dump (f1db_csv), keyed by their numeric Ergast IDs
+TABLES = {
+    "circuits": {
+        "columns": {"circuitId": "INTEGER PRIMARY KEY", "circuitRef": "TEXT NOT NULL", "name": "TEXT",
+                    "location": "TEXT", "country": "TEXT", "lat": "REAL", "lng": "REAL"},
+        "indexes": [("circuitRef",)]
+    },
+    "drivers": {
+        "columns": {"driverId": "INTEGER PRIMARY KEY", "driverRef": "TEXT NOT NULL", "code": "TEXT",
+                    "forename": "TEXT", "surname": "TEXT", "dob": "TEXT", "nationality": "TEXT"},
+        "indexes": [("driverRef",)]
+    },
+    "constructors": {
+        "columns": {"constructorId": "INTEGER PRIMARY KEY", "constructorRef": "TEXT NOT NULL",
+                    "name": "TEXT", "nationality": "TEXT"},
+        "indexes": [("constructorRef",)]
+    },
+    "status": {
+        "columns": {"statusId": "INTEGER PRIMARY KEY", "status": "TEXT"},
+        "indexes": []
+    },
+    "races": {
+        "columns": {"raceId": "INTEGER PRIMARY KEY", "year": "INTEGER NOT NULL", "round": "INTEGER NOT NULL",
+                    "circuitId": "INTEGER REFERENCES circuits", "name": "TEXT", "date": "TEXT"},
+        "indexes": [("year", "round")]
+    },
+    "results": {
+        "columns": {"resultId": "INTEGER PRIMARY KEY", "raceId": "INTEGER NOT NULL REFERENCES races",
+                    "driverId": "INTEGER NOT NULL REFERENCES drivers",
+                    "constructorId": "INTEGER NOT NULL REFERENCES constructors",
+                    "grid": "INTEGER", "position": "INTEGER", "positionText": "TEXT", "positionOrder": "INTEGER",
+                    "points": "REAL", "laps": "INTEGER", "statusId": "INTEGER REFERENCES status"},
+        "indexes": [("raceId", "driverId"), ("driverId",), ("constructorId",)]
+    },
+    "qualifying": {
+        "columns": {"qualifyId": "INTEGER PRIMARY KEY", "raceId": "INTEGER NOT NULL REFERENCES races",
+                    "driverId": "INTEGER NOT NULL REFERENCES drivers", "constructorId": "INTEGER",
+                    "position": "INTEGER"},
+        "indexes": [("raceId", "driverId")]
+    },
+    "pit_stops": {
+        "columns": {"raceId": "INTEGER NOT NULL REFERENCES races", "driverId": "INTEGER NOT NULL REFERENCES drivers",
+                    "stop": "INTEGER NOT NULL", "lap": "INTEGER", "milliseconds": "INTEGER"},
+        "primary_key": ("raceId", "driverId", "stop"),
+        "indexes": []
+    },
+    "lap_times": {
+        "columns": {"raceId": "INTEGER NOT NULL REFERENCES races", "driverId": "INTEGER NOT NULL REFERENCES drivers",
+                    "lap": "INTEGER NOT NULL", "position": "INTEGER", "milliseconds": "INTEGER"},
+        "primary_key": ("raceId", "driverId", "lap"),
+        "indexes": [],
+        "optional": True
+    }
+}
+
+
+class DumpReader:
+    """Opens ``<table>.csv`` files from a dump directory or a .zip archive."""
+
+    def __init__(self, source):
+        self.source = source
+        self.archive = zipfile.ZipFile(source) if zipfile.is_zipfile(source) else None
+
+    def _member(self, table):
+        names = self.archive.namelist() if self.archive else os.listdir(self.source)
+        for name in names:
+            if os.path.basename(name) == f"{table}.csv":
+                return name
+        return None
+
+    def has(self, table):
+        return self._member(table) is not None
+
+    def chunks(self, table, columns, chunksize=200_000):
+        member = self._member(table)
+        handle = self.archive.open(member) if self.archive else open(os.path.join(self.source, member), "rb")
+        with handle:
+            # The dump writes NULL as \N
+            reader = pd.read_csv(io.TextIOWrapper(handle, encoding="utf-8"), usecols=list(columns),
+                                 na_values=["\\N"], keep_default_na=False, chunksize=chunksize)
+            for chunk in reader:
+                yield chunk[list(columns)]
+
+    def close(self):
+        if self.archive:
+            self.archive.close()
+
+
+def create_table(conn, table, spec):
+    columns = [f'"{name}" {kind}' for name, kind in spec["columns"].items()]
+    if "primary_key" in spec:
+        columns.append(f"PRIMARY KEY ({', '.join(spec['primary_key'])})")
+    conn.execute(f'CREATE TABLE "{table}" ({", ".join(columns)})')
+
+
+def create_indexes(conn, table, spec):
+    for columns in spec["indexes"]:
+        name = f"idx_{table}_{'_'.join(columns)}"
+        conn.execute(f'CREATE INDEX "{name}" ON "{table}" ({", ".join(columns)})')
+
+
+def load_dump(source, db_path=STORE_PATH):
+    """Bulk loads an Ergast CSV dump into a fresh SQLite file, then swaps it into place.
+
+    Returns the number of rows loaded per table.
+    """
+    reader = DumpReader(source)
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    tmp_path = f"{db_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    counts = {}
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        for table, spec in tqdm(TABLES.items(), desc="Loading dump"):
+            if not reader.has(table):
+                if spec.get("optional"):
+                    continue
+                raise FileNotFoundError(f"{table}.csv not found in {source}")
+
+            create_table(conn, table, spec)
+            placeholders = ", ".join("?" for _ in spec["columns"])
+            counts[table] = 0
+            with conn:
+                for chunk in reader.chunks(table, spec["columns"]):
+                    rows = chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None)
+                    conn.executemany(f'INSERT INTO "{table}" VALUES ({placeholders})', rows)
+                    counts[table] += len(chunk)
+            # Indexes are built once after the bulk insert, which is far cheaper than maintaining them per row
+            create_indexes(conn, table, spec)
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+        reader.close()
+
+    os.replace(tmp_path, db_path)
+    return counts
+
+
+def connect(db_path=STORE_PATH):
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"No Ergast store at {db_path}. Load a dump with `python ergast_store.py DUMP`.")
+    return sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+
+
+RESULTS_QUERY = """
+SELECT
+    ra.year, ra.round, ra.date,
+    c.circuitRef AS circuit_id, c.name AS circuit, c.location, c.country,
+    d.driverRef AS driver_id, d.forename || ' ' || d.surname AS driver,
+    co.constructorRef AS constructor_id, co.name AS constructor,
+    r.positionOrder AS position, r.grid,
+    COALESCE(q.position, -1) AS qualifying_position,
+    s.status,
+    COALESCE(p.pit_stops, 0) AS pit_stops
+FROM results r
+JOIN races ra ON ra.raceId = r.raceId
+JOIN circuits c ON c.circuitId = ra.circuitId
+JOIN drivers d ON d.driverId = r.driverId
+JOIN constructors co ON co.constructorId = r.constructorId
+LEFT JOIN status s ON s.statusId = r.statusId
+LEFT JOIN (
+    SELECT raceId, driverId, MIN(position) AS position FROM qualifying GROUP BY raceId, driverId
+) q ON q.raceId = r.raceId AND q.driverId = r.driverId
+LEFT JOIN (
+    SELECT raceId, driverId, COUNT(*) AS pit_stops FROM pit_stops GROUP BY raceId, driverId
+) p ON p.raceId = r.raceId AND p.driverId = r.driverId
+WHERE ra.year BETWEEN ? AND ?
+ORDER BY ra.year, ra.round, r.positionOrder
+"""
+
+
+def race_results(start_year=2000, end_year=2025, db_path=STORE_PATH):
+    """Race results in the same shape as ingest.iter_race_results, straight from the store."""
+    with closing(connect(db_path)) as conn:
+        df = pd.read_sql_query(RESULTS_QUERY, conn, params=(start_year, end_year))
+    df["status"] = df["status"].fillna("")
+    df["dnf"] = df["status"].str.lower() != "finished"
+    return df[RESULT_COLUMNS]
+
+
+def circuit_coordinates(db_path=STORE_PATH):
+    with closing(connect(db_path)) as conn:
+        rows = conn.execute("SELECT name, lat, lng FROM circuits WHERE lat IS NOT NULL AND lng IS NOT NULL")
+        return {name: (lat, lng) for name, lat, lng in rows}
+
+
+def export_laps(races, db_path=STORE_PATH, laps_dir=None, refresh=False):
+    """Writes stored lap times into the laps.py race files, so lap features need no HTTP."""
+    from laps import LAPS_DIR, LAP_COLUMNS, mark_stints, race_path, write_race_laps
+
+    laps_dir = laps_dir or LAPS_DIR
+    written = 0
+    with closing(connect(db_path)) as conn:
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'lap_times'").fetchone():
+            return 0
+        for year, round_num in sorted({(int(y), int(r)) for y, r in races}):
+            path = race_path(year, round_num, laps_dir)
+            if os.path.exists(path) and not refresh:
+                continue
+            laps = pd.read_sql_query("""
+                SELECT ra.year, ra.round, d.driverRef AS driver_id, l.lap, l.position, l.milliseconds
+                FROM lap_times l
+                JOIN races ra ON ra.raceId = l.raceId
+                JOIN drivers d ON d.driverId = l.driverId
+                WHERE ra.year = ? AND ra.round = ?
+            """, conn, params=(year, round_num))
+            if laps.empty:
+                continue
+            stops = pd.read_sql_query("""
+                SELECT d.driverRef AS driver_id, p.lap
+                FROM pit_stops p
+                JOIN races ra ON ra.raceId = p.raceId
+                JOIN drivers d ON d.driverId = p.driverId
+                WHERE ra.year = ? AND ra.round = ?
+            """, conn, params=(year, round_num))
+            laps = mark_stints(laps[LAP_COLUMNS[:6]], stops)
+            write_race_laps(laps, path)
+            written += len(laps)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load an Ergast CSV dump (directory or .zip) into a local SQLite store")
+    parser.add_argument("source", help="path to the extracted f1db_csv directory or its .zip archive")
+    parser.add_argument("--db", default=STORE_PATH)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    counts = load_dump(args.source, args.db)
+    for table, count in counts.items():
+        print(f"  {table:<14}{count:>10,}")
+    print(f"✅ Loaded {sum(counts.values()):,} rows into {args.db} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
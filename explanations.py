@@ -0,0 +1,80 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from dataset_store import ROOT_DIR, MODEL_FEATURES, load_dataset
+from prediction_store import model_fingerprint
+from tree_model import CBM_PATH
+
+SHAP_PATH = os.path.join(ROOT_DIR, "data", "shap_values.parquet")
+KEY_COLUMNS = ["year", "round", "driver"]
+
+
+def compute_shap_values(dataset, cbm_path=CBM_PATH):
+    """Per-row SHAP contributions for the whole dataset in one native CatBoost call."""
+    from catboost import CatBoostClassifier, Pool
+
+    model = CatBoostClassifier()
+    model.load_model(cbm_path)
+    shap = model.get_feature_importance(Pool(dataset[MODEL_FEATURES]), type="ShapValues")
+
+    explanations = dataset[KEY_COLUMNS + ["constructor"]].reset_index(drop=True).copy()
+    for i, feature in enumerate(MODEL_FEATURES):
+        explanations[feature] = shap[:, i].astype(np.float32)
+    explanations["base_value"] = shap[:, -1].astype(np.float32)
+    return explanations
+
+
+def write_explanations(explanations, fingerprint, path=SHAP_PATH):
+    # Stamped with the model that produced them, like the prediction store
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    explanations.assign(model_fingerprint=fingerprint).to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_explanations(path=SHAP_PATH, fingerprint=None):
+    """Loads stored explanations, or nothing if they were computed for another model."""
+    if not os.path.exists(path):
+        return None, {}
+    explanations = pd.read_parquet(path)
+    if fingerprint is not None:
+        stamps = explanations["model_fingerprint"] if "model_fingerprint" in explanations.columns else pd.Series([None])
+        if (stamps != fingerprint).any():
+            print(f"⚠️ {path} was computed for a different model, run `python explanations.py` to refresh it")
+            return None, {}
+    keys = zip(explanations["year"].astype(int), explanations["round"].astype(int), explanations["driver"].astype(str))
+    index = {key: i for i, key in enumerate(keys)}
+    return explanations, index
+
+
+def explain(explanations, index, year, round_num, driver):
+    # Contributions to the log-odds of a podium, largest effect first
+    row = index.get((int(year), int(round_num), str(driver)))
+    if row is None:
+        return None
+    contributions = explanations.iloc[row][MODEL_FEATURES].astype(float)
+    return contributions.reindex(contributions.abs().sort_values(ascending=False).index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute SHAP explanations for every row of the dataset")
+    parser.add_argument("--cbm", default=CBM_PATH)
+    parser.add_argument("--out", default=SHAP_PATH)
+    args = parser.parse_args()
+
+    dataset = load_dataset()
+    started = time.perf_counter()
+    explanations = compute_shap_values(dataset, args.cbm)
+    # The default .cbm is served through its .npz export, which is what the app fingerprints
+    fingerprint = model_fingerprint() if args.cbm == CBM_PATH else model_fingerprint(args.cbm)
+    path = write_explanations(explanations, fingerprint, args.out)
+    print(f"✅ Saved SHAP values for {len(explanations)} rows to {path} in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
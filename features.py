@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+FORM_FEATURES = [
+    "driver_podiums", "driver_wins", "constructor_podiums", "constructor_wins",
+    "driver_last5_avg_finish", "driver_circuit_races", "driver_circuit_podiums",
+    "driver_circuit_avg_finish", "teammate_grid_delta"
+]
+
+
+def prior_cumsum(values, keys):
+    # Running total per group, excluding the current row
+    return values.groupby(keys).cumsum() - values
+
+
+def teammate_mean_grid(grid, team_keys):
+    # Mean grid slot of the other cars in the same team and race, NaN without a teammate
+    grid = pd.to_numeric(grid, errors="coerce").astype(float)
+    team_grid = grid.groupby(team_keys).transform("sum")
+    team_size = grid.groupby(team_keys).transform("count")
+    return (team_grid - grid.fillna(0)) / (team_size - grid.notna()).replace(0, np.nan)
+
+
+def teammate_grid_delta(grid, team_keys):
+    grid = pd.to_numeric(grid, errors="coerce").astype(float)
+    return grid - teammate_mean_grid(grid, team_keys)
+
+
+def add_form_features(results):
+    """Adds as-of-race form features computed from the results table alone.
+
+    Every feature only uses races strictly before the current one (grid
+    position excepted, which is known before the start), so historical rows
+    carry no future information.
+    """
+    df = results.sort_values(["year", "round"], kind="stable").copy()
+    position = pd.to_numeric(df["position"], errors="coerce").astype(float)
+    podium = (position <= 3).astype(int)
+    win = (position == 1).astype(int)
+    driver = df["driver"].astype(str)
+    constructor = df["constructor"].astype(str)
+    circuit = df["circuit"].astype(str)
+
+    df["driver_podiums"] = prior_cumsum(podium, driver)
+    df["driver_wins"] = prior_cumsum(win, driver)
+
+    # Constructors score twice per race, so accumulate per race before shifting
+    race_key = df["year"].astype(int) * 100 + df["round"].astype(int)
+    team_race = pd.DataFrame({"constructor": constructor, "race": race_key, "podium": podium, "win": win})
+    per_race = team_race.groupby(["constructor", "race"], sort=True)[["podium", "win"]].sum()
+    before = per_race.groupby(level="constructor").cumsum() - per_race
+    lookup = pd.MultiIndex.from_arrays([constructor, race_key])
+    df["constructor_podiums"] = before["podium"].reindex(lookup).to_numpy()
+    df["constructor_wins"] = before["win"].reindex(lookup).to_numpy()
+
+    previous_finish = position.groupby(driver).shift()
+    df["driver_last5_avg_finish"] = (
+        previous_finish.groupby(driver).rolling(5, min_periods=1).mean().reset_index(level=0, drop=True)
+    )
+
+    driver_circuit = [driver, circuit]
+    df["driver_circuit_races"] = df.groupby(driver_circuit).cumcount()
+    df["driver_circuit_podiums"] = prior_cumsum(podium, driver_circuit)
+    finished = position.notna().astype(int)
+    circuit_finishes = prior_cumsum(finished, driver_circuit)
+    circuit_total = prior_cumsum(position.fillna(0), driver_circuit)
+    df["driver_circuit_avg_finish"] = (circuit_total / circuit_finishes.replace(0, np.nan))
+
+    df["teammate_grid_delta"] = teammate_grid_delta(df["grid"], [race_key, constructor])
+
+    return df.reindex(results.index)
@@ -0,0 +1,180 @@
+import asyncio
+import atexit
+import os
+import random
+import threading
+import time
+
+import aiohttp
+import requests
+
+from metrics import metrics
+
+RATE_LIMIT = float(os.environ.get("F1_RATE_LIMIT", 4))
+BURST = int(os.environ.get("F1_RATE_BURST", 4))
+MAX_CONCURRENCY = int(os.environ.get("F1_MAX_CONCURRENCY", 8))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class FetchError(requests.exceptions.RequestException):
+    pass
+
+
+class TokenBucket:
+    """Rate limiter shared by the event loop and plain worker threads."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        # Take a token now and return how long the caller has to wait for it
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait:
+            metrics.inc("rate_limit_wait_seconds_total", wait)
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self._reserve()
+        if wait:
+            metrics.inc("rate_limit_wait_seconds_total", wait)
+            await asyncio.sleep(wait)
+
+
+class FetchEngine:
+    """Pooled aiohttp client running on a background event loop.
+
+    Every request waits on one global token bucket, at most ``max_concurrency``
+    requests are in flight, and 429/5xx responses are retried with
+    exponential backoff plus jitter. Synchronous callers (worker threads)
+    share the same loop, client and limiter through the ``*_sync`` helpers.
+    """
+
+    def __init__(self, rate=RATE_LIMIT, burst=BURST, max_concurrency=MAX_CONCURRENCY,
+                 max_retries=5, backoff_base=0.5, backoff_cap=30.0):
+        self.bucket = TokenBucket(rate, burst)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._loop = None
+        self._session = None
+        self._semaphore = None
+        self._lock = threading.Lock()
+
+    def _backoff(self, attempt, retry_after=None):
+        if retry_after:
+            try:
+                return min(self.backoff_cap, float(retry_after))
+            except ValueError:
+                pass
+        delay = min(self.backoff_cap, self.backoff_base * 2 ** attempt)
+        return random.uniform(0, delay)
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=self._loop.run_forever, name="fetch-engine", daemon=True)
+                thread.start()
+                atexit.register(self.close)
+        return self._loop
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=30)
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def _sleep_backoff(self, attempt, retry_after=None, client="ergast"):
+        delay = self._backoff(attempt, retry_after)
+        metrics.inc("http_retries_total", client=client)
+        metrics.inc("http_backoff_seconds_total", delay, client=client)
+        await asyncio.sleep(delay)
+
+    async def fetch_text(self, url, timeout=10):
+        session = self._get_session()
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire_async()
+            retry_after = None
+            started = time.perf_counter()
+            try:
+                async with self._semaphore:
+                    async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as res:
+                        body = await res.read()
+                        metrics.inc("http_requests_total", client="ergast", status=res.status)
+                        metrics.inc("http_bytes_downloaded_total", len(body), client="ergast")
+                        metrics.observe("http_request_seconds", time.perf_counter() - started, client="ergast")
+                        if res.status in RETRY_STATUSES:
+                            retry_after = res.headers.get("Retry-After")
+                            last_error = FetchError(f"HTTP {res.status} for {url}")
+                        elif res.status >= 400:
+                            metrics.inc("http_failures_total", client="ergast")
+                            raise FetchError(f"HTTP {res.status} for {url}")
+                        else:
+                            return body.decode(res.charset or "utf-8", errors="replace")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                metrics.inc("http_requests_total", client="ergast", status=type(e).__name__)
+                last_error = FetchError(f"{type(e).__name__} for {url}: {e}")
+
+            if attempt < self.max_retries:
+                await self._sleep_backoff(attempt, retry_after)
+        metrics.inc("http_failures_total", client="ergast")
+        raise last_error
+
+    async def call(self, fn, *args, client="meteostat"):
+        # Rate-limited blocking call for clients we don't own (e.g. Meteostat)
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire_async()
+            started = time.perf_counter()
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+                metrics.inc("http_requests_total", client=client, status="ok")
+                return result
+            except Exception as e:
+                metrics.inc("http_requests_total", client=client, status=type(e).__name__)
+                last_error = e
+            finally:
+                metrics.observe("http_request_seconds", time.perf_counter() - started, client=client)
+            if attempt < self.max_retries:
+                await self._sleep_backoff(attempt, client=client)
+        metrics.inc("http_failures_total", client=client)
+        raise last_error
+
+    def submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def run(self, coro):
+        return self.submit(coro).result()
+
+    def fetch_text_sync(self, url, timeout=10):
+        return self.run(self.fetch_text(url, timeout))
+
+    def call_sync(self, fn, *args):
+        return self.run(self.call(fn, *args))
+
+    def close(self):
+        if self._loop is None or not self._loop.is_running():
+            return
+        if self._session is not None and not self._session.closed:
+            asyncio.run_coroutine_threadsafe(self._session.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+engine = FetchEngine()
@@ -4,23 +4,29 @@ document.getElementById("predict-form").addEventListener("submit", async functio
     const year = document.getElementById("year").value;
     const round = document.getElementById("round").value;
   
-    // 🔁 MOCKED for now — you’ll later point this to your backend
-    const mockResult = ["max_verstappen", "charles_leclerc", "fernando_alonso"];
-  
-    // Simulate "fetch" call
-    await new Promise(resolve => setTimeout(resolve, 500)); // fake delay
-  
-    // Display result
     const resultDiv = document.getElementById("prediction-result");
     const podiumList = document.getElementById("podium-list");
   
     resultDiv.classList.remove("hidden");
     podiumList.innerHTML = "";
   
-    mockResult.forEach((driver, idx) => {
+    try {
+      // Served by server.py (python server.py), which also hosts this page
+      const response = await fetch(`/predict?year=${encodeURIComponent(year)}&round=${encodeURIComponent(round)}`);
+      const result = await response.json();
+  
+      if (!response.ok) {
+        throw new Error(result.error || `Request failed with status ${response.status}`);
+      }
+  
+      result.podium.forEach((entry, idx) => {
+        const li = document.createElement("li");
+        li.textContent = `#${idx + 1}: ${entry.driver.toUpperCase()} (${entry.constructor}) – ${(entry.probability * 100).toFixed(1)}%`;
+        podiumList.appendChild(li);
+      });
+    } catch (err) {
       const li = document.createElement("li");
-      li.textContent = `#${idx + 1}: ${driver.replace("_", " ").toUpperCase()}`;
+      li.textContent = `⚠️ ${err.message}`;
       podiumList.appendChild(li);
-    });
+    }
   });
-  
\ No newline at end of file
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+import requests
+
+from fetch_engine import engine
+from metrics import metrics
+
+# live    - always hit the network, never touch the cache
+# record  - serve cached responses, fetch and store anything missing
+# replay  - serve cached responses only, fail on a miss (offline / CI)
+# refresh - like record, but re-fetch mutable responses older than max_age
+MODES = ("live", "record", "replay", "refresh")
+
+# refresh by default so current-season responses cannot go stale; finished seasons are still cached forever
+DEFAULT_MODE = os.environ.get("F1_HTTP_MODE", "refresh")
+CACHE_DIR = os.environ.get("F1_HTTP_CACHE_DIR", "cache/http")
+MAX_AGE = float(os.environ.get("F1_HTTP_MAX_AGE", 7 * 24 * 3600))
+
+_write_lock = threading.Lock()
+
+
+class CacheMiss(requests.exceptions.RequestException):
+    pass
+
+
+def parse_json(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        # Ergast occasionally returns invalid escape sequences
+        clean_text = re.sub(r'\\[^"\\/bfnrtu]', '', text)
+        return json.loads(clean_text)
+
+
+def cache_path(url, cache_dir=None):
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir or CACHE_DIR, key[:2], f"{key}.json")
+
+
+def is_immutable(url):
+    # Anything scoped to a finished season will never change
+    match = re.search(r"/f1/(\d{4})[/.]", url)
+    return bool(match) and int(match.group(1)) < datetime.now().year
+
+
+def read_cached(url, cache_dir=None):
+    path = cache_path(url, cache_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_cached(url, text, cache_dir=None):
+    path = cache_path(url, cache_dir)
+    entry = {"url": url, "fetched_at": time.time(), "body": text}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with _write_lock:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+    return entry
+
+
+def cached_body(url, mode, max_age=None, cache_dir=None):
+    if mode not in MODES:
+        raise ValueError(f"Unknown HTTP cache mode '{mode}', expected one of {MODES}")
+    if mode == "live":
+        return None, None
+
+    cached = read_cached(url, cache_dir)
+    if mode == "replay":
+        if cached is None:
+            raise CacheMiss(f"No recorded response for {url}")
+        return cached["body"], cached
+
+    if cached is not None:
+        if mode == "record" or is_immutable(url):
+            return cached["body"], cached
+        age = time.time() - cached["fetched_at"]
+        if age < (MAX_AGE if max_age is None else max_age):
+            return cached["body"], cached
+
+    return None, cached
+
+
+def lookup(url, mode, max_age=None, cache_dir=None):
+    try:
+        body, cached = cached_body(url, mode, max_age, cache_dir)
+    except CacheMiss:
+        metrics.inc("http_cache_misses_total", mode=mode)
+        raise
+    metrics.inc("http_cache_hits_total" if body is not None else "http_cache_misses_total", mode=mode)
+    return body, cached
+
+
+def get_text(url, mode=None, timeout=10, max_age=None, cache_dir=None):
+    mode = mode or DEFAULT_MODE
+    body, cached = lookup(url, mode, max_age, cache_dir)
+    if body is not None:
+        return body
+
+    try:
+        text = engine.fetch_text_sync(url, timeout)
+    except requests.exceptions.RequestException:
+        if cached is not None:
+            metrics.inc("http_stale_fallbacks_total")
+            print(f"⚠️ Serving stale cached response for {url}")
+            return cached["body"]
+        raise
+
+    if mode != "live":
+        write_cached(url, text, cache_dir)
+    return text
+
+
+async def get_text_async(url, mode=None, timeout=10, max_age=None, cache_dir=None):
+    mode = mode or DEFAULT_MODE
+    body, cached = lookup(url, mode, max_age, cache_dir)
+    if body is not None:
+        return body
+
+    try:
+        text = await engine.fetch_text(url, timeout)
+    except requests.exceptions.RequestException:
+        if cached is not None:
+            metrics.inc("http_stale_fallbacks_total")
+            print(f"⚠️ Serving stale cached response for {url}")
+            return cached["body"]
+        raise
+
+    if mode != "live":
+        write_cached(url, text, cache_dir)
+    return text
+
+
+def get_json(url, mode=None, timeout=10, max_age=None, cache_dir=None):
+    return parse_json(get_text(url, mode, timeout, max_age, cache_dir))
+
+
+async def get_json_async(url, mode=None, timeout=10, max_age=None, cache_dir=None):
+    return parse_json(await get_text_async(url, mode, timeout, max_age, cache_dir))
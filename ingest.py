@@ -0,0 +1,210 @@
+import asyncio
+import os
+from collections import deque
+
+import pandas as pd
+import requests
+from tqdm import tqdm
+
+from fetch_engine import engine
+from http_cache import get_json_async
+from metrics import metrics
+
+BASE_URL = "https://ergast.com/api/f1"
+
+RESULT_COLUMNS = [
+    "year", "round", "date", "circuit_id", "circuit", "location", "country",
+    "driver_id", "driver", "constructor_id", "constructor",
+    "position", "grid", "qualifying_position", "dnf", "status", "pit_stops"
+]
+
+
+PAGE_SIZE = 100
+PIT_STOP_FIRST_SEASON = 2011  # Ergast has no pit stop data before 2011
+
+
+def race_table(res_json):
+    if 'MRData' not in res_json or 'RaceTable' not in res_json['MRData']:
+        raise ValueError("Unexpected API response structure")
+    return res_json['MRData']['RaceTable']['Races']
+
+
+async def fetch_paginated(url):
+    """Fetches every page of a limit/offset endpoint and returns all Races entries."""
+    first = await get_json_async(f"{url}?limit={PAGE_SIZE}&offset=0")
+    total = int(first['MRData'].get('total', 0))
+    pages = await asyncio.gather(
+        *(get_json_async(f"{url}?limit={PAGE_SIZE}&offset={offset}") for offset in range(PAGE_SIZE, total, PAGE_SIZE))
+    )
+    races = []
+    for page in [first] + list(pages):
+        races.extend(race_table(page))
+    return races
+
+
+def parse_race_results(year, race, results):
+    circuit = race['Circuit']
+    rows = []
+
+    # For each race result
+    for result in results:
+        driver = result['Driver']
+        constructor = result['Constructor']
+
+        position = None
+        if isinstance(result['position'], str) and result['position'].isdigit():
+            position = int(result['position'])
+
+        status = result.get('status', '')
+        rows.append({
+            "year": int(year),
+            "round": int(race['round']),
+            "date": race['date'],
+            "circuit_id": circuit.get('circuitId'),
+            "circuit": circuit['circuitName'],
+            "location": circuit['Location']['locality'],
+            "country": circuit['Location']['country'],
+            "driver_id": driver.get('driverId'),
+            "driver": f"{driver['givenName']} {driver['familyName']}",
+            "constructor_id": constructor.get('constructorId'),
+            "constructor": constructor['name'],
+            "position": position,
+            "grid": int(result.get('grid', -1)),  # starting grid position
+            "dnf": status.lower() != 'finished',
+            "status": status
+        })
+    return rows
+
+
+async def fetch_season_qualifying(year):
+    rows = []
+    for race in await fetch_paginated(f"{BASE_URL}/{year}/qualifying.json"):
+        for result in race.get('QualifyingResults', []):
+            rows.append({
+                "round": int(race['round']),
+                "driver_id": result['Driver']['driverId'],
+                "qualifying_position": int(result['position'])
+            })
+    return pd.DataFrame(rows, columns=["round", "driver_id", "qualifying_position"])
+
+
+async def fetch_season_pit_stops(year, rounds):
+    # Ergast only serves pit stops per round, so page through each round concurrently
+    if year < PIT_STOP_FIRST_SEASON:
+        return pd.DataFrame(columns=["round", "driver_id", "pit_stops"])
+    seasons = await asyncio.gather(*(fetch_paginated(f"{BASE_URL}/{year}/{r}/pitstops.json") for r in rounds))
+    rows = [
+        {"round": int(race['round']), "driver_id": stop['driverId']}
+        for races in seasons for race in races for stop in race.get('PitStops', [])
+    ]
+    stops = pd.DataFrame(rows, columns=["round", "driver_id"])
+    return stops.groupby(["round", "driver_id"]).size().rename("pit_stops").reset_index()
+
+
+async def fetch_optional(site, coro, empty):
+    try:
+        return await coro
+    except Exception as e:
+        metrics.inc("swallowed_errors_total", site=site)
+        print(f"Could not fetch {site}: {e}")
+        return empty
+
+
+async def fetch_season_results(year):
+    try:
+        races = await fetch_paginated(f"{BASE_URL}/{year}/results.json")
+
+        # A race can be split across pages, so regroup results by round
+        by_round = {}
+        for race in races:
+            entry = by_round.setdefault(race['round'], (race, []))
+            entry[1].extend(race.get('Results', []))
+
+        rows = []
+        for race, results in by_round.values():
+            try:
+                rows.extend(parse_race_results(year, race, results))
+            except Exception as race_error:
+                metrics.inc("swallowed_errors_total", site="fetch_race")
+                print(f"Error processing race {race.get('round')} in {year}: {race_error}")
+        if not rows:
+            return []
+
+        results = pd.DataFrame(rows)
+        rounds = sorted(results['round'].unique())
+        qualifying, pit_stops = await asyncio.gather(
+            fetch_optional(f"qualifying {year}", fetch_season_qualifying(year),
+                           pd.DataFrame(columns=["round", "driver_id", "qualifying_position"])),
+            fetch_optional(f"pit stops {year}", fetch_season_pit_stops(year, rounds),
+                           pd.DataFrame(columns=["round", "driver_id", "pit_stops"]))
+        )
+
+        results = results.merge(qualifying.astype({"round": int}), on=["round", "driver_id"], how="left")
+        results = results.merge(pit_stops.astype({"round": int}), on=["round", "driver_id"], how="left")
+        results["qualifying_position"] = results["qualifying_position"].fillna(-1).astype(int)
+        results["pit_stops"] = results["pit_stops"].fillna(0).astype(int)
+        results = results.sort_values("round", kind="stable")[RESULT_COLUMNS]
+        return results.astype(object).where(results.notna(), None).to_dict("records")
+
+    except requests.exceptions.RequestException as e:
+        metrics.inc("swallowed_errors_total", site="fetch_season_request")
+        print(f"Request failed for year {year}: {e}")
+        return []
+    except Exception as year_error:
+        metrics.inc("swallowed_errors_total", site="fetch_season")
+        print(f"Error processing year {year}: {year_error}")
+        return []
+
+
+def iter_race_results(start_year=2000, end_year=2025, prefetch=2):
+    """Streams normalized result records season by season.
+
+    Up to ``prefetch`` seasons are fetched ahead on the fetch engine, so memory
+    is bounded by a few seasons no matter how many years are requested.
+    """
+    years = iter(range(start_year, end_year + 1))
+    pending = deque()
+
+    def schedule():
+        year = next(years, None)
+        if year is not None:
+            pending.append(engine.submit(fetch_season_results(year)))
+
+    for _ in range(max(1, prefetch)):
+        schedule()
+
+    with tqdm(total=end_year - start_year + 1, desc="Fetching race results") as progress:
+        while pending:
+            season = pending.popleft().result()
+            schedule()
+            progress.update(1)
+            yield from season
+
+
+def write_results(records, path, chunk_size=1000, progress_path=None):
+    # Flush every chunk to a progress file, then move it into place when complete
+    progress_path = progress_path or f"{path}.partial"
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if os.path.exists(progress_path):
+        os.remove(progress_path)
+
+    chunk = []
+    total = 0
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            total += flush_chunk(chunk, progress_path)
+            chunk = []
+    if chunk:
+        total += flush_chunk(chunk, progress_path)
+
+    if total:
+        os.replace(progress_path, path)
+    return total
+
+
+def flush_chunk(chunk, path):
+    write_header = not os.path.exists(path)
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        pd.DataFrame(chunk, columns=RESULT_COLUMNS).to_csv(f, header=write_header, index=False)
+    return len(chunk)
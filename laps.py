@@ -0,0 +1,210 @@
+import argparse
+import asyncio
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from fetch_engine import engine
+from ingest import BASE_URL, PIT_STOP_FIRST_SEASON, fetch_paginated
+from metrics import metrics
+
+LAPS_DIR = os.path.join("data", "laps")
+LAP_COLUMNS = ["year", "round", "driver_id", "lap", "position", "milliseconds", "stint", "pit_lap"]
+LAP_FEATURES = [
+    "lap_median_s", "laps_completed", "lap_consistency_s",
+    "stint_pace_s", "pace_delta_pct", "tyre_deg_s_per_lap"
+]
+# As-of versions of the race measurements, averaged over a driver's previous races
+PRIOR_LAP_FEATURES = ["driver_last5_pace_delta_pct", "driver_last5_lap_consistency_s", "driver_last5_tyre_deg_s_per_lap"]
+# Laps slower than this multiple of a driver's median (safety car, incidents) are not "clean"
+CLEAN_LAP_RATIO = 1.07
+
+
+def race_path(year, round_num, laps_dir=LAPS_DIR):
+    return os.path.join(laps_dir, f"year={int(year)}", f"round={int(round_num):02d}.parquet")
+
+
+def parse_lap_time(value):
+    # "1:32.123" -> 92123 ms
+    minutes, _, seconds = str(value).rpartition(":")
+    return int(round((int(minutes or 0) * 60 + float(seconds)) * 1000))
+
+
+def mark_stints(laps, stops):
+    """Adds the stint index (stops before the lap) and in/out-lap flags to raw lap rows."""
+    laps = laps.copy()
+    laps["stint"] = 0
+    laps["pit_lap"] = False
+    for driver_id, driver_stops in stops.groupby("driver_id"):
+        stop_laps = np.sort(driver_stops["lap"].to_numpy(dtype=int))
+        mask = laps["driver_id"] == driver_id
+        numbers = laps.loc[mask, "lap"].to_numpy(dtype=int)
+        laps.loc[mask, "stint"] = np.searchsorted(stop_laps, numbers, side="left")
+        laps.loc[mask, "pit_lap"] = np.isin(numbers, stop_laps) | np.isin(numbers - 1, stop_laps)
+    laps = laps[LAP_COLUMNS]
+    return laps.astype({"year": "int16", "round": "int8", "lap": "int16", "position": "int8",
+                        "milliseconds": "int32", "stint": "int8", "pit_lap": bool})
+
+
+def parse_laps(year, round_num, lap_races, pit_races):
+    stops = pd.DataFrame(
+        [{"driver_id": stop['driverId'], "lap": int(stop['lap'])}
+         for race in pit_races for stop in race.get('PitStops', [])],
+        columns=["driver_id", "lap"]
+    )
+    rows = [
+        {
+            "year": int(year),
+            "round": int(round_num),
+            "driver_id": timing['driverId'],
+            "lap": int(lap['number']),
+            "position": int(timing['position']),
+            "milliseconds": parse_lap_time(timing['time'])
+        }
+        for race in lap_races for lap in race.get('Laps', []) for timing in lap.get('Timings', [])
+    ]
+    return mark_stints(pd.DataFrame(rows, columns=LAP_COLUMNS[:6]), stops)
+
+
+def write_race_laps(laps, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    laps.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+async def fetch_race_laps(year, round_num, laps_dir):
+    # Each race is written as soon as it arrives, so nothing accumulates in memory
+    try:
+        lap_races = await fetch_paginated(f"{BASE_URL}/{year}/{round_num}/laps.json")
+        if not lap_races:
+            # No timings published (yet): write nothing so the race is fetched again next run
+            return 0
+        pit_races = []
+        if year >= PIT_STOP_FIRST_SEASON:
+            pit_races = await fetch_paginated(f"{BASE_URL}/{year}/{round_num}/pitstops.json")
+        laps = parse_laps(year, round_num, lap_races, pit_races)
+        await asyncio.to_thread(write_race_laps, laps, race_path(year, round_num, laps_dir))
+        metrics.inc("lap_rows_written_total", len(laps))
+        return len(laps)
+    except Exception as e:
+        metrics.inc("swallowed_errors_total", site="fetch_laps")
+        print(f"Could not fetch laps for {year} round {round_num}: {e}")
+        return 0
+
+
+def ingest_laps(races, laps_dir=LAPS_DIR, refresh=False):
+    """Streams lap timings for (year, round) pairs into year-partitioned Parquet files.
+
+    Races already on disk are skipped unless ``refresh`` is set.
+    """
+    pending = sorted({(int(y), int(r)) for y, r in races
+                      if refresh or not os.path.exists(race_path(y, r, laps_dir))})
+    written = 0
+    with tqdm(total=len(pending), desc="Fetching laps") as progress:
+        for year in sorted({y for y, _ in pending}):
+            futures = [engine.submit(fetch_race_laps(y, r, laps_dir)) for y, r in pending if y == year]
+            for future in futures:
+                written += future.result()
+                progress.update(1)
+    return written
+
+
+def aggregate_race(path):
+    """Per-driver pace, consistency and degradation for one race file."""
+    laps = pd.read_parquet(path)
+    if laps.empty:
+        return pd.DataFrame(columns=["year", "round", "driver_id"] + LAP_FEATURES)
+
+    laps["seconds"] = laps["milliseconds"] / 1000
+    by_driver = laps.groupby("driver_id")["seconds"]
+    median = by_driver.transform("median")
+    clean = laps[(laps["lap"] > 1) & ~laps["pit_lap"] & (laps["seconds"] <= median * CLEAN_LAP_RATIO)]
+    stints = clean.groupby(["driver_id", "stint"])
+
+    agg = pd.DataFrame({
+        "lap_median_s": by_driver.median(),
+        "laps_completed": by_driver.size(),
+        "lap_consistency_s": clean.groupby("driver_id")["seconds"].std(),
+        "stint_pace_s": stints["seconds"].median().groupby(level="driver_id").mean()
+    })
+    agg["pace_delta_pct"] = agg["stint_pace_s"] / agg["stint_pace_s"].min() - 1
+
+    # Pooled within-stint slope of lap time against lap number
+    x = clean["lap"] - stints["lap"].transform("mean")
+    y = clean["seconds"] - stints["seconds"].transform("mean")
+    slope = (x * y).groupby(clean["driver_id"]).sum() / (x * x).groupby(clean["driver_id"]).sum().replace(0, np.nan)
+    agg["tyre_deg_s_per_lap"] = slope
+
+    agg = agg.reset_index()
+    agg.insert(0, "round", int(laps["round"].iloc[0]))
+    agg.insert(0, "year", int(laps["year"].iloc[0]))
+    return agg[["year", "round", "driver_id"] + LAP_FEATURES]
+
+
+def aggregate_laps(laps_dir=LAPS_DIR, years=None, workers=None):
+    # One race file per task keeps each worker's memory bounded by a single race
+    paths = sorted(glob.glob(os.path.join(laps_dir, "year=*", "round=*.parquet")))
+    if years is not None:
+        wanted = {f"year={int(y)}" for y in years}
+        paths = [p for p in paths if os.path.basename(os.path.dirname(p)) in wanted]
+    if not paths:
+        return pd.DataFrame(columns=["year", "round", "driver_id"] + LAP_FEATURES)
+
+    workers = workers or min(len(paths), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        parts = list(tqdm(executor.map(aggregate_race, paths, chunksize=8), total=len(paths), desc="Aggregating laps"))
+    parts = [part for part in parts if not part.empty]
+    if not parts:
+        return pd.DataFrame(columns=["year", "round", "driver_id"] + LAP_FEATURES)
+    return pd.concat(parts, ignore_index=True)
+
+
+def add_lap_features(results, aggregates):
+    # Same-race measurements: they describe the race itself, not the build-up to it
+    df = results.drop(columns=[c for c in LAP_FEATURES if c in results.columns])
+    aggregates = aggregates.astype({"year": int, "round": int, "driver_id": str})
+    keys = df[["year", "round", "driver_id"]].astype({"year": int, "round": int, "driver_id": str})
+    joined = keys.merge(aggregates, on=["year", "round", "driver_id"], how="left")
+    for column in LAP_FEATURES:
+        df[column] = joined[column].to_numpy(dtype=float)
+    return df
+
+
+def add_prior_lap_features(results, window=5):
+    """Adds each driver's average pace delta, consistency and degradation over their previous races.
+
+    Only races strictly before the current one are used, so unlike LAP_FEATURES these can be model inputs.
+    Races without lap timings count towards the window but not towards the average.
+    """
+    df = results.sort_values(["year", "round"], kind="stable").copy()
+    driver = df["driver"].astype(str)
+    for column, source in zip(PRIOR_LAP_FEATURES, ["pace_delta_pct", "lap_consistency_s", "tyre_deg_s_per_lap"]):
+        previous = df[source].astype(float).groupby(driver).shift()
+        df[column] = previous.groupby(driver).rolling(window, min_periods=1).mean().reset_index(level=0, drop=True)
+    return df.reindex(results.index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest lap timings and aggregate them per driver and race")
+    parser.add_argument("--start-year", type=int, default=2000)
+    parser.add_argument("--end-year", type=int, default=2023)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--refresh", action="store_true", help="re-fetch races already on disk")
+    args = parser.parse_args()
+
+    from dataset_store import load_dataset
+    races = load_dataset(columns=["year", "round"], years=range(args.start_year, args.end_year + 1))
+    races = races.drop_duplicates()
+    rows = ingest_laps(zip(races["year"], races["round"]), refresh=args.refresh)
+    print(f"✅ Wrote {rows:,} lap rows to {LAPS_DIR}")
+    aggregates = aggregate_laps(years=range(args.start_year, args.end_year + 1), workers=args.workers)
+    print(f"📊 Aggregated {len(aggregates):,} driver-race rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,98 +1,27 @@
-import requests
 import pandas as pd
-from time import sleep
 from tqdm import tqdm
 from datetime import datetime
 from meteostat import Point, Daily
 import os
 import json
-import re
+import hashlib
+import argparse
 from concurrent.futures import ThreadPoolExecutor, as_completed
-
-
-def fetch_race_results(start_year=2000, end_year=2025):
-    base_url = "https://ergast.com/api/f1"
-    all_results = []
-
-    for year in tqdm(range(start_year, end_year + 1), desc="Fetching race results"):
-        try:
-            r = requests.get(f"{base_url}/{year}.json?limit=1000", timeout=10)
-            r.raise_for_status()
-            year_data = r.json()
-
-            if 'MRData' not in year_data or 'RaceTable' not in year_data['MRData']:
-                print(f"Warning: Unexpected API response structure for year {year}")
-                continue
-
-            rounds = year_data['MRData']['RaceTable']['Races']
-
-            for race in rounds:
-                try:
-                    round_num = race['round']
-                    race_date = race['date']
-                    circuit = race['Circuit']
-                    circuit_name = circuit['circuitName']
-                    location = circuit['Location']['locality']
-                    country = circuit['Location']['country']
-
-                    results_url = f"{base_url}/{year}/{round_num}/results.json?limit=100"
-                    res = requests.get(results_url, timeout=10)
-                    try:
-                        res_json = res.json()
-                    except ValueError:
-                        clean_text = re.sub(r'\\[^"\\/bfnrtu]', '', res.text)
-                        res_json = json.loads(clean_text)
-
-                    sleep(0.25)
-
-                    if 'MRData' not in res_json or 'RaceTable' not in res_json['MRData']:
-                        continue
-
-                    races = res_json['MRData']['RaceTable']['Races']
-                    if not races:
-                        continue
-
-                    # For each race result
-                    for result in races[0]['Results']:
-                        driver = result['Driver']
-                        constructor = result['Constructor']
-
-                        position = None
-                        if isinstance(result['position'], str) and result['position'].isdigit():
-                            position = int(result['position'])
-
-                        grid = int(result.get('grid', -1))  # starting grid position
-                        qual_position = int(result.get('QualifyingPosition', -1))  # placeholder for qualifying, will overwrite later
-                        dnf = result.get('status', '').lower() != 'finished'
-                        pit_stops = 0  # placeholder, will overwrite later
-
-                        all_results.append({
-                            "year": int(year),
-                            "round": int(round_num),
-                            "circuit": circuit_name,
-                            "location": location,
-                            "country": country,
-                            "date": race_date,
-                            "driver": f"{driver['givenName']} {driver['familyName']}",
-                            "constructor": constructor['name'],
-                            "position": position,
-                            "grid": grid,
-                            "qualifying_position": qual_position,
-                            "dnf": dnf,
-                            "pit_stops": pit_stops
-                        })
-                except Exception as race_error:
-                    print(f"Error processing race {round_num} in {year}: {race_error}")
-                    continue
-
-        except requests.exceptions.RequestException as e:
-            print(f"Request failed for year {year}: {e}")
-            continue
-        except Exception as year_error:
-            print(f"Error processing year {year}: {year_error}")
-            continue
-
-    return pd.DataFrame(all_results)
+from fetch_engine import engine
+from ingest import RESULT_COLUMNS, iter_race_results
+from dataset_store import DATASET_PATH, write_dataset
+from features import add_form_features
+from laps import ingest_laps, aggregate_laps, add_lap_features, add_prior_lap_features
+import ergast_store
+from ergast_store import STORE_PATH
+from metrics import metrics
+
+
+def fetch_race_results(start_year=2000, end_year=2025, source="api", store_path=STORE_PATH):
+    # "store" reads a loaded Ergast dump from disk, "api" streams from the Ergast API
+    if source == "store":
+        return ergast_store.race_results(start_year, end_year, store_path)
+    return pd.DataFrame(iter_race_results(start_year, end_year), columns=RESULT_COLUMNS)
 
 def get_circuit_coordinates():
     return {
@@ -132,114 +61,91 @@ def get_circuit_coordinates():
         "Indianapolis Motor Speedway": (39.795, -86.2347)
     }
 
-def fetch_weather_data(lat, lon, date):
-    retry_count = 3
-    for _ in range(retry_count):
-        try:
-            date_obj = datetime.strptime(date, "%Y-%m-%d")
-            point = Point(lat, lon)
-            data = Daily(point, date_obj, date_obj)
-            data = data.fetch()
-
-            if not data.empty:
-                row = data.iloc[0]
-                return (
-                    row.get('tavg', None),
-                    row.get('rhum', None),
-                    row.get('wspd', None),
-                    row.get('prcp', None)
-                )
-        except Exception as e:
-            print(f"Weather retry error for {date} at {lat},{lon}: {e}")
-            sleep(1)
-    return None, None, None, None
-
-def get_driver_id(full_name):
-    parts = full_name.lower().split()
-    if len(parts) == 2:
-        return parts[1]
-    return full_name.lower().replace(" ", "_")
-
-def fetch_driver_stats(driver_name):
-    try:
-        driver_id = get_driver_id(driver_name)
-        url = f"https://ergast.com/api/f1/drivers/{driver_id}/results.json?limit=1000"
-        res = requests.get(url, timeout=10)
-        sleep(0.25)
-        try:
-            data = res.json()
-        except ValueError:
-            clean_text = re.sub(r'\\[^"\\/bfnrtu]', '', res.text)
-            data = json.loads(clean_text)
-
-        races = data['MRData']['RaceTable']['Races']
-        podiums = 0
-        wins = 0
-
-        for race in races:
-            for result in race.get('Results', []):
-                pos = result.get('position', '')
-                if pos.isdigit():
-                    position = int(pos)
-                    if position <= 3:
-                        podiums += 1
-                    if position == 1:
-                        wins += 1
-
-        return {"podiums": podiums, "wins": wins}
-    except Exception as e:
-        print(f"Error fetching stats for {driver_name}: {e}")
-        return {"podiums": 0, "wins": 0}
+WEATHER_COLUMNS = ["temperature", "humidity", "wind_speed", "precipitation"]
 
-def fetch_constructor_stats(constructor_name):
+def fetch_weather_range(lat, lon, start_date, end_date):
+    start = datetime.strptime(start_date, "%Y-%m-%d")
+    end = datetime.strptime(end_date, "%Y-%m-%d")
     try:
-        constructor_id = constructor_name.lower().replace(" ", "_")
-        url = f"https://ergast.com/api/f1/constructors/{constructor_id}/results.json?limit=1000"
-        res = requests.get(url, timeout=10)
-        sleep(0.25)
-        try:
-            data = res.json()
-        except ValueError:
-            clean_text = re.sub(r'\\[^"\\/bfnrtu]', '', res.text)
-            data = json.loads(clean_text)
-
-        races = data['MRData']['RaceTable']['Races']
-        podiums = 0
-        wins = 0
-
-        for race in races:
-            for result in race.get('Results', []):
-                pos = result.get('position', '')
-                if pos.isdigit():
-                    position = int(pos)
-                    if position <= 3:
-                        podiums += 1
-                    if position == 1:
-                        wins += 1
-
-        return {"podiums": podiums, "wins": wins}
+        # Meteostat does its own HTTP, so run it under the shared rate limiter
+        return engine.call_sync(lambda: Daily(Point(lat, lon), start, end).fetch())
     except Exception as e:
-        print(f"Error fetching stats for {constructor_name}: {e}")
-        return {"podiums": 0, "wins": 0}
-
-def enrich_row(row, circuit_coords):
-    try:
-        circuit = row['circuit']
+        metrics.inc("swallowed_errors_total", site="weather")
+        print(f"Weather fetch failed for {start_date}..{end_date} at {lat},{lon}: {e}")
+        return pd.DataFrame()
+
+def load_weather_store(path="cache/weather_store.csv"):
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=["circuit", "date"] + WEATHER_COLUMNS)
+    return pd.read_csv(path)
+
+def build_weather_store(race_results, circuit_coords, path="cache/weather_store.csv", offline=False):
+    # One date-range Daily query per circuit instead of one per result row.
+    store = load_weather_store(path)
+    known = set(zip(store['circuit'], store['date']))
+
+    races = race_results[['circuit', 'date']].drop_duplicates()
+    # A boolean Series, so an empty mask still selects zero rows rather than zero columns
+    is_missing = pd.Series([key not in known for key in zip(races['circuit'], races['date'])],
+                           index=races.index, dtype=bool)
+    missing = races[is_missing]
+    if offline:
+        # Only what is already stored; missing weather stays empty
+        missing = missing.iloc[0:0]
+
+    new_rows = []
+    for circuit, group in tqdm(missing.groupby('circuit'), desc="Fetching weather"):
         lat, lon = circuit_coords.get(circuit, (None, None))
+        if lat is None or lon is None:
+            continue
 
-        temp_c, humidity, wind_speed, precip_mm = (None, None, None, None)
-        if lat and lon:
-            temp_c, humidity, wind_speed, precip_mm = fetch_weather_data(lat, lon, row['date'])
+        dates = sorted(group['date'])
+        data = fetch_weather_range(lat, lon, dates[0], dates[-1])
+        if data.empty:
+            # Nothing is stored for a failed fetch, so these dates are retried next run
+            continue
+        data.index = data.index.strftime("%Y-%m-%d")
 
-        driver_stats = fetch_driver_stats(row['driver'])
-        constructor_stats = fetch_constructor_stats(row['constructor'])
+        for date in dates:
+            if date not in data.index:
+                continue
+            row = data.loc[date]
+            new_rows.append({
+                "circuit": circuit,
+                "date": date,
+                "temperature": row.get('tavg', None),
+                "humidity": row.get('rhum', None),
+                "wind_speed": row.get('wspd', None),
+                "precipitation": row.get('prcp', None)
+            })
+
+    if new_rows:
+        store = pd.concat([store, pd.DataFrame(new_rows)], ignore_index=True)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        store.to_csv(path, index=False)
+
+    return {
+        (circuit, date): (temp_c, humidity, wind_speed, precip_mm)
+        for circuit, date, temp_c, humidity, wind_speed, precip_mm
+        in store[["circuit", "date"] + WEATHER_COLUMNS].itertuples(index=False)
+    }
+
+def enrich_row(row, weather_lookup):
+    try:
+        circuit = row['circuit']
+        temp_c, humidity, wind_speed, precip_mm = weather_lookup.get(
+            (circuit, row['date']), (None, None, None, None)
+        )
 
         return {
             "year": row['year'],
             "round": row['round'],
             "driver": row['driver'],
+            "driver_id": row.get("driver_id", None),
             "constructor": row['constructor'],
+            "constructor_id": row.get("constructor_id", None),
             "circuit": circuit,
+            "circuit_id": row.get("circuit_id", None),
             "location": row['location'],
             "country": row['country'],
             "date": row['date'],
@@ -251,39 +157,165 @@ def enrich_row(row, circuit_coords):
             "temperature": temp_c,
             "humidity": humidity,
             "wind_speed": wind_speed,
-            "precipitation": precip_mm,
-            "driver_podiums": driver_stats['podiums'],
-            "constructor_podiums": constructor_stats['podiums'],
-            "driver_wins": driver_stats['wins'],
-            "constructor_wins": constructor_stats['wins']
+            "precipitation": precip_mm
         }
     except Exception as e:
+        metrics.inc("swallowed_errors_total", site="enrich_row")
         print(f"❌ Error enriching row: {e}")
         return None
 
-def build_master_dataset(start_year=2000, end_year=2025):
+CHECKPOINT_VERSION = 3
+
+def race_content_hashes(race_results):
+    hashes = {}
+    for (year, round_num), group in race_results.groupby(['year', 'round']):
+        payload = group.sort_values(['driver', 'constructor']).to_csv(index=False)
+        hashes[f"{int(year)}-{int(round_num)}"] = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    return hashes
+
+def load_checkpoint(checkpoint_file, manifest_file):
+    manifest = {"version": CHECKPOINT_VERSION, "races": {}}
+    if os.path.exists(manifest_file):
+        with open(manifest_file, "r", encoding="utf-8") as f:
+            saved_manifest = json.load(f)
+        if saved_manifest.get("version") == CHECKPOINT_VERSION:
+            manifest = saved_manifest
+        else:
+            print("⚠️ Checkpoint format changed, rebuilding from scratch")
+
+    rows = pd.DataFrame()
+    if manifest["races"] and os.path.exists(checkpoint_file):
+        rows = pd.read_csv(checkpoint_file)
+
+    # A race only counts as done if its rows actually made it into the checkpoint
+    present = set()
+    if not rows.empty:
+        present = set(rows['year'].astype(str) + "-" + rows['round'].astype(str))
+    missing = [key for key in manifest["races"] if key not in present]
+    for key in missing:
+        del manifest["races"][key]
+    if missing:
+        print(f"⚠️ {len(missing)} races in the manifest have no checkpoint rows and will be rebuilt")
+    return manifest, rows
+
+def save_manifest(manifest, manifest_file):
+    tmp_path = f"{manifest_file}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, manifest_file)
+
+def write_checkpoint(rows, checkpoint_file):
+    tmp_path = f"{checkpoint_file}.tmp"
+    with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+        rows.to_csv(f, index=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, checkpoint_file)
+
+def append_checkpoint(rows, checkpoint_file):
+    if not rows:
+        return
+    write_header = not os.path.exists(checkpoint_file)
+    with open(checkpoint_file, "a", newline="", encoding="utf-8") as f:
+        pd.DataFrame(rows).to_csv(f, header=write_header, index=False)
+        f.flush()
+        os.fsync(f.fileno())
+
+def build_master_dataset(start_year=2000, end_year=2025, incremental=True, dataset_path=DATASET_PATH, with_laps=True,
+                         source="api", store_path=STORE_PATH):
     print("🔄 Starting data collection...")
+    metrics.reset()
 
     checkpoint_file = "progress_checkpoint.csv"
-    race_results = fetch_race_results(start_year, end_year)
+    manifest_file = "progress_manifest.json"
+    with metrics.stage("race_fetch") as stage:
+        race_results = fetch_race_results(start_year, end_year, source, store_path)
+        stage["rows"] = len(race_results)
     if race_results.empty:
         raise ValueError("No race results were fetched. Check API connectivity.")
 
+    if incremental:
+        manifest, checkpoint_rows = load_checkpoint(checkpoint_file, manifest_file)
+    else:
+        manifest, checkpoint_rows = {"version": CHECKPOINT_VERSION, "races": {}}, pd.DataFrame()
+
+    # Only races whose source results are new or changed get re-enriched
+    race_hashes = race_content_hashes(race_results)
+    pending = {key for key, digest in race_hashes.items() if manifest["races"].get(key) != digest}
+    for key in pending:
+        manifest["races"].pop(key, None)
+
+    if not checkpoint_rows.empty:
+        checkpoint_keys = checkpoint_rows['year'].astype(str) + "-" + checkpoint_rows['round'].astype(str)
+        checkpoint_rows = checkpoint_rows[checkpoint_keys.isin(manifest["races"].keys())]
+        write_checkpoint(checkpoint_rows, checkpoint_file)
+    elif os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
+    save_manifest(manifest, manifest_file)
+
+    race_keys = race_results['year'].astype(str) + "-" + race_results['round'].astype(str)
+    pending_results = race_results[race_keys.isin(pending)]
+    print(f"🧩 {len(race_hashes) - len(pending)} races up to date, {len(pending)} to enrich")
+
+    offline = source == "store"
     circuit_coords = get_circuit_coordinates()
-    all_data = []
-
-    with ThreadPoolExecutor(max_workers=16) as executor:
-        futures = {
-            executor.submit(enrich_row, row, circuit_coords): idx
-            for idx, row in race_results.iterrows()
-        }
-
-        for future in tqdm(as_completed(futures), total=len(futures), desc="Enriching"):
-            result = future.result()
-            if result:
-                all_data.append(result)
-
-    df = pd.DataFrame(all_data)
+    if offline:
+        circuit_coords = {**ergast_store.circuit_coordinates(store_path), **circuit_coords}
+    with metrics.stage("weather"):
+        weather_lookup = build_weather_store(pending_results, circuit_coords, offline=offline)
+    remaining = race_keys[race_keys.isin(pending)].value_counts().to_dict()
+    race_rows = {key: [] for key in pending}
+    race_failed = set()
+
+    with metrics.stage("enrichment", rows=len(pending_results)):
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            futures = {
+                executor.submit(enrich_row, row, weather_lookup): race_keys[idx]
+                for idx, row in pending_results.iterrows()
+            }
+
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Enriching"):
+                key = futures[future]
+                result = future.result()
+                if result:
+                    race_rows[key].append(result)
+                else:
+                    race_failed.add(key)
+
+                remaining[key] -= 1
+                if remaining[key] == 0:
+                    # Every row of this race is done: persist it before moving on
+                    with metrics.timer("checkpoint_write_seconds"):
+                        append_checkpoint(race_rows.pop(key), checkpoint_file)
+                    if key not in race_failed:
+                        manifest["races"][key] = race_hashes[key]
+                        save_manifest(manifest, manifest_file)
+
+    if race_failed:
+        print(f"⚠️ {len(race_failed)} races had rows that failed to enrich and will be retried next run")
+
+    # Form features are computed locally over the full history, as of each race
+    with metrics.stage("form_features") as stage:
+        if not os.path.exists(checkpoint_file):
+            raise ValueError("No enriched rows in the checkpoint. Every race failed to enrich.")
+        df = pd.read_csv(checkpoint_file).sort_values(['year', 'round']).reset_index(drop=True)
+        df = add_form_features(df)
+        stage["rows"] = len(df)
+
+    # Lap timings are streamed to disk per race, then aggregated race by race in worker processes
+    if with_laps:
+        with metrics.stage("lap_features") as stage:
+            races = df[['year', 'round']].drop_duplicates()
+            if offline:
+                ergast_store.export_laps(zip(races['year'], races['round']), store_path)
+            else:
+                ingest_laps(zip(races['year'], races['round']))
+            # df holds the whole checkpoint history, so every season in it needs its aggregates
+            aggregates = aggregate_laps(years=df['year'].unique())
+            df = add_prior_lap_features(add_lap_features(df, aggregates))
+            stage["rows"] = len(aggregates)
 
     output_paths = [
         "data/f1_master_dataset.csv",
@@ -292,24 +324,43 @@ def build_master_dataset(start_year=2000, end_year=2025):
     ]
 
     saved = False
-    for path in output_paths:
-        try:
-            os.makedirs(os.path.dirname(path), exist_ok=True)
-            df.to_csv(path, index=False)
-            print(f"✅ Successfully saved to {os.path.abspath(path)}")
-            saved = True
-            break
-        except Exception as e:
-            print(f"⚠️ Could not save to {path}: {e}")
+    with metrics.stage("csv_write", rows=len(df)):
+        for path in output_paths:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                df.to_csv(path, index=False)
+                print(f"✅ Successfully saved to {os.path.abspath(path)}")
+                saved = True
+                break
+            except Exception as e:
+                metrics.inc("swallowed_errors_total", site="csv_write")
+                print(f"⚠️ Could not save to {path}: {e}")
 
     if not saved:
         raise Exception("Failed to save CSV to all attempted locations")
 
+    try:
+        with metrics.stage("parquet_write", rows=len(df)):
+            write_dataset(df, dataset_path)
+        print(f"✅ Saved Parquet dataset to {dataset_path}")
+    except Exception as e:
+        metrics.inc("swallowed_errors_total", site="parquet_write")
+        print(f"⚠️ Could not save Parquet dataset: {e}")
+
+    report_path, prom_path = metrics.write_report()
+    print(f"📊 Run report saved to {report_path} and {prom_path}")
+
     return df
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the master dataset")
+    parser.add_argument("--start-year", type=int, default=2000)
+    parser.add_argument("--end-year", type=int, default=2023)
+    parser.add_argument("--source", choices=["api", "store"], default="api",
+                        help="'store' builds from a dump loaded with ergast_store.py, without HTTP")
+    args = parser.parse_args()
     try:
-        master_df = build_master_dataset(2000, 2023)
+        master_df = build_master_dataset(args.start_year, args.end_year, source=args.source)
         print("Data collection complete!")
         print(f"Total records collected: {len(master_df)}")
     except Exception as e:
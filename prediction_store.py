@@ -0,0 +1,125 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from dataset_store import ROOT_DIR, MODEL_FEATURES, load_dataset
+from tree_model import NPZ_PATH, PKL_PATH, load_serving_model
+
+PREDICTIONS_PATH = os.path.join(ROOT_DIR, "data", "predictions.parquet")
+RACE_COLUMNS = ["driver", "constructor"] + MODEL_FEATURES
+TOP_N = 3
+
+
+def model_fingerprint(model_path=None, features=MODEL_FEATURES):
+    # Same file preference as load_serving_model, plus the feature set it is fed
+    if model_path is None:
+        model_path = NPZ_PATH if os.path.exists(NPZ_PATH) else PKL_PATH
+    digest = hashlib.sha256()
+    with open(model_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    digest.update(json.dumps(list(features)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def race_feature_hashes(dataset):
+    # Order-independent per race: row hashes are summed (wrapping) within each race
+    row_hashes = pd.util.hash_pandas_object(dataset[RACE_COLUMNS], index=False)
+    keys = dataset[["year", "round"]].astype(int)
+    sums = row_hashes.groupby([keys["year"].to_numpy(), keys["round"].to_numpy()]).sum()
+    return {(int(year), int(round_num)): f"{int(value):016x}" for (year, round_num), value in sums.items()}
+
+
+def rank_top_n(rows, probabilities, n=TOP_N):
+    """Ranks every race by podium probability and keeps the first ``n`` drivers."""
+    ranked = rows[["year", "round", "driver", "constructor", "qualifying_position", "grid"]].copy()
+    ranked["probability"] = probabilities.astype(np.float32)
+    ranked = ranked.sort_values(["year", "round", "probability"], ascending=[True, True, False], kind="stable")
+    ranked["rank"] = (ranked.groupby(["year", "round"], observed=True).cumcount() + 1).astype(np.int8)
+    return ranked[ranked["rank"] <= n].reset_index(drop=True)
+
+
+def build_predictions(model, dataset, fingerprint, existing=None):
+    """Scores only the races whose features or model changed since the last run.
+
+    Returns the refreshed table and the number of races that were re-scored.
+    """
+    hashes = race_feature_hashes(dataset)
+    keep = pd.DataFrame()
+    if existing is not None and not existing.empty:
+        years, rounds = existing["year"].astype(int).to_numpy(), existing["round"].astype(int).to_numpy()
+        keys = list(zip(years, rounds))
+        current = np.array([hashes.get(key) for key in keys], dtype=object)
+        valid = (existing["model_fingerprint"].to_numpy() == fingerprint) & (existing["race_hash"].to_numpy() == current)
+        # A race stays only if all of its stored rows are still valid
+        valid = pd.Series(valid).groupby([years, rounds]).transform("all").to_numpy()
+        keep = existing[valid]
+        fresh = set(key for key, ok in zip(keys, valid) if ok)
+    else:
+        fresh = set()
+
+    stale = [key for key in hashes if key not in fresh]
+    if not stale:
+        return keep.reset_index(drop=True), 0
+
+    keys = pd.MultiIndex.from_frame(dataset[["year", "round"]].astype(int))
+    rows = dataset[keys.isin(stale)]
+    # One batch call over every stale race
+    ranked = rank_top_n(rows, model.predict_proba(rows[MODEL_FEATURES])[:, 1])
+    ranked["race_hash"] = [hashes[(int(y), int(r))] for y, r in zip(ranked["year"], ranked["round"])]
+    ranked["model_fingerprint"] = fingerprint
+
+    table = pd.concat([keep, ranked], ignore_index=True) if not keep.empty else ranked
+    return table.sort_values(["year", "round", "rank"]).reset_index(drop=True), len(stale)
+
+
+def write_predictions(table, path=PREDICTIONS_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    table.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_predictions(path=PREDICTIONS_PATH):
+    if not os.path.exists(path):
+        return None, {}
+    table = pd.read_parquet(path)
+    index = {}
+    for i, key in enumerate(zip(table["year"].astype(int), table["round"].astype(int))):
+        index.setdefault(key, []).append(i)
+    return table, index
+
+
+def lookup(table, index, year, round_num, fingerprint, race_hash):
+    # Entries from another model or for changed race data are never served
+    rows = index.get((int(year), int(round_num)))
+    if table is None or rows is None:
+        return None
+    podium = table.iloc[rows]
+    if (podium["model_fingerprint"] != fingerprint).any() or (podium["race_hash"] != race_hash).any():
+        return None
+    return podium.sort_values("rank")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Materialize ranked podium predictions for every historical race")
+    parser.add_argument("--out", default=PREDICTIONS_PATH)
+    parser.add_argument("--full", action="store_true", help="re-score every race instead of only stale ones")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    existing = None if args.full else load_predictions(args.out)[0]
+    table, rescored = build_predictions(load_serving_model(), load_dataset(), model_fingerprint(), existing)
+    path = write_predictions(table, args.out)
+    print(f"✅ Re-scored {rescored} races, {table[['year', 'round']].drop_duplicates().shape[0]} stored "
+          f"in {path} ({time.perf_counter() - started:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
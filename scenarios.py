@@ -0,0 +1,146 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from dataset_store import MODEL_FEATURES, load_dataset, build_race_index
+from features import teammate_grid_delta, teammate_mean_grid
+
+# Overrides applied to the recorded race weather; "As raced" keeps it unchanged
+WEATHER_VARIANTS = {
+    "As raced": {},
+    "Dry": {"precipitation": 0.0},
+    "Light rain": {"precipitation": 2.0},
+    "Heavy rain": {"precipitation": 15.0},
+    "Heatwave": {"temperature": 35.0, "precipitation": 0.0},
+}
+GRID_SLOTS = list(range(1, 21))
+
+
+def feature_order(model):
+    return list(getattr(model, "feature_names_", None) or MODEL_FEATURES)
+
+
+def build_sweep(race_df, features, grids=GRID_SLOTS, weather=tuple(WEATHER_VARIANTS)):
+    """Stacks every (weather, grid, driver) variant of a race into one array.
+
+    The result has shape ``(len(weather), len(grids), drivers, features)``,
+    built by broadcasting the race matrix instead of copying it per scenario.
+    Each driver's row is that driver starting from the grid slot while everyone
+    else keeps their recorded slot, so grid-derived features follow the grid.
+    """
+    unknown = [name for name in weather if name not in WEATHER_VARIANTS]
+    if unknown:
+        raise ValueError(f"Unknown weather variants: {', '.join(unknown)}")
+
+    base = race_df[features].to_numpy(dtype=np.float32, na_value=np.nan)
+    stacked = np.broadcast_to(base, (len(weather), len(grids)) + base.shape).copy()
+    grid_values = np.asarray(grids, dtype=np.float32)
+    stacked[..., features.index("grid")] = grid_values[None, :, None]
+    if "teammate_grid_delta" in features:
+        teammates = teammate_mean_grid(race_df["grid"], race_df["constructor"].astype(str)).to_numpy(dtype=np.float32)
+        stacked[..., features.index("teammate_grid_delta")] = grid_values[None, :, None] - teammates[None, None, :]
+    for w, name in enumerate(weather):
+        for column, value in WEATHER_VARIANTS[name].items():
+            stacked[w, ..., features.index(column)] = value
+    return stacked
+
+
+def run_sweep(model, race_df, grids=GRID_SLOTS, weather=tuple(WEATHER_VARIANTS)):
+    # One predict_proba call for the whole sweep
+    features = feature_order(model)
+    stacked = build_sweep(race_df, features, grids, weather)
+    probabilities = model.predict_proba(stacked.reshape(-1, len(features)))[:, 1].reshape(stacked.shape[:-1])
+
+    w, g, d = np.meshgrid(np.arange(len(weather)), np.arange(len(grids)), np.arange(len(race_df)), indexing="ij")
+    drivers = race_df["driver"].astype(str).to_numpy()
+    return pd.DataFrame({
+        "weather": np.asarray(weather, dtype=object)[w.ravel()],
+        "grid": np.asarray(grids)[g.ravel()],
+        "driver": drivers[d.ravel()],
+        "probability": probabilities.ravel()
+    })
+
+
+def sensitivity_table(sweep, weather="As raced"):
+    """Podium probability per driver (rows) and starting grid slot (columns)."""
+    table = sweep[sweep["weather"] == weather].pivot(index="driver", columns="grid", values="probability")
+    return table.loc[table.max(axis=1).sort_values(ascending=False).index]
+
+
+def sensitivity_summary(sweep, race_df):
+    # Probability at the real grid slot under each weather variant, plus the grid swing
+    actual = race_df[["driver", "grid"]].astype({"driver": str}).rename(columns={"grid": "actual_grid"})
+    grids = sweep["grid"].unique()
+    nearest = actual["actual_grid"].map(lambda slot: grids[np.abs(grids - slot).argmin()])
+    at_grid = sweep.merge(actual.assign(grid=nearest), on=["driver", "grid"])
+    weather = list(dict.fromkeys(sweep["weather"]))
+    summary = at_grid.pivot(index="driver", columns="weather", values="probability")[weather]
+
+    as_raced = sweep[sweep["weather"] == weather[0]]
+    by_grid = as_raced.pivot(index="driver", columns="grid", values="probability")
+    summary["best_grid_probability"] = by_grid.max(axis=1)
+    summary["grid_swing"] = by_grid.max(axis=1) - by_grid.min(axis=1)
+    summary = summary.join(actual.set_index("driver")["actual_grid"])
+    return summary.sort_values(summary.columns[0], ascending=False)
+
+
+def what_if(model, race_df, overrides=None, weather="As raced"):
+    """Scores one scenario next to the recorded race.
+
+    ``overrides`` maps a driver to feature values, e.g. ``{"Max Verstappen": {"grid": 10}}``.
+    """
+    features = feature_order(model)
+    scenario = race_df.copy()
+    for column, value in WEATHER_VARIANTS[weather].items():
+        scenario[column] = value
+    for driver, values in (overrides or {}).items():
+        mask = scenario["driver"].astype(str) == driver
+        if not mask.any():
+            raise ValueError(f"{driver} did not take part in this race")
+        for column, value in values.items():
+            scenario.loc[mask, column] = value
+    if any("grid" in values for values in (overrides or {}).values()):
+        # Overridden drivers and their teammates get a delta that matches the new grid
+        scenario["teammate_grid_delta"] = teammate_grid_delta(scenario["grid"], scenario["constructor"].astype(str))
+
+    # Recorded and scenario rows go through a single batched call
+    stacked = np.vstack([
+        race_df[features].to_numpy(dtype=np.float32, na_value=np.nan),
+        scenario[features].to_numpy(dtype=np.float32, na_value=np.nan)
+    ])
+    probabilities = model.predict_proba(stacked)[:, 1]
+    result = pd.DataFrame({
+        "driver": race_df["driver"].astype(str).to_numpy(),
+        "recorded": probabilities[:len(race_df)],
+        "scenario": probabilities[len(race_df):]
+    })
+    result["change"] = result["scenario"] - result["recorded"]
+    return result.sort_values("scenario", ascending=False).reset_index(drop=True)
+
+
+def main():
+    from tree_model import load_serving_model
+
+    parser = argparse.ArgumentParser(description="Sweep grid slots and weather for one race")
+    parser.add_argument("year", type=int)
+    parser.add_argument("round", type=int)
+    args = parser.parse_args()
+
+    dataset = load_dataset(years=[args.year])
+    _, race_slices = build_race_index(dataset)
+    if (args.year, args.round) not in race_slices:
+        raise SystemExit(f"❌ No data for {args.year} round {args.round}")
+    race_df = dataset.iloc[race_slices[(args.year, args.round)]]
+
+    model = load_serving_model()
+    started = time.perf_counter()
+    sweep = run_sweep(model, race_df)
+    elapsed = time.perf_counter() - started
+    print(f"📊 Scored {len(sweep):,} scenarios in {elapsed * 1000:.1f} ms")
+    print(sensitivity_summary(sweep, race_df).round(3).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,72 +1,251 @@
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import joblib
+import numpy as np
 import pandas as pd
 from catboost import CatBoostClassifier, Pool
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
-import shap
-import matplotlib.pyplot as plt
-import os
-import joblib 
-
-# Load dataset
-df = pd.read_csv("C:/Users/avant/OneDrive/Desktop/f1-podium-predictor/f1_master_dataset.csv")
-
-# Drop rows with missing target or essential info
-df.dropna(subset=["position"], inplace=True)
-
-# Convert target to binary (1 = podium, 0 = not podium)
-df["podium"] = df["position"].apply(lambda x: 1 if x <= 3 else 0)
-
-# Features to use
-features = [
-    "year", "round", "grid", "qualifying_position", "dnf", "pit_stops",
-    "temperature", "humidity", "wind_speed", "precipitation",
-    "driver_podiums", "constructor_podiums", "driver_wins", "constructor_wins"
-]
-
-# Optional: convert categorical identifiers if you want (not used for CatBoost but useful for exploration)
-cat_features = []  # All features above are numeric or ordinal
-
-# Split data
-X_train, X_test, y_train, y_test = train_test_split(
-    df[features], df["podium"], test_size=0.2, random_state=42, stratify=df["podium"]
-)
-
-# Create CatBoost pool
-train_pool = Pool(X_train, y_train, cat_features=cat_features)
-test_pool = Pool(X_test, y_test, cat_features=cat_features)
-
-# Train model
-model = CatBoostClassifier(
-    iterations=1000,
-    learning_rate=0.05,
-    depth=6,
-    loss_function="Logloss",
-    eval_metric="AUC",
-    early_stopping_rounds=50,
-    verbose=100
-)
-model.fit(train_pool, eval_set=test_pool)
-
-# Evaluate
-y_pred = model.predict(X_test)
-print("\n🔍 Classification Report:")
-print(classification_report(y_test, y_pred))
-print("✅ Accuracy:", accuracy_score(y_test, y_pred))
-print("📉 Confusion Matrix:")
-print(confusion_matrix(y_test, y_pred))
-
-# SHAP explainability
-explainer = shap.Explainer(model)
-shap_values = explainer(X_test)
-os.makedirs("models", exist_ok=True)
-
-# Save as CatBoost binary model
-model.save_model("models/catboost_podium_model.cbm")
-
-# Optionally, save as joblib for use with joblib.load()
-joblib.dump(model, "models/catboost_podium_model.pkl")
-
-print("✅ Model saved to models/ directory")
-
-print("\n📊 SHAP summary plot:")
-shap.summary_plot(shap_values, X_test)
+from sklearn.metrics import classification_report, confusion_matrix, accuracy_score, roc_auc_score, log_loss
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(SCRIPT_DIR))
+from dataset_store import MODEL_FEATURES, load_dataset
+from tree_model import export_model
+
+MODELS_DIR = os.path.join(SCRIPT_DIR, "models")
+STATE_PATH = os.path.join(MODELS_DIR, "training_state.json")
+
+DEFAULT_PARAMS = {"depth": 6, "learning_rate": 0.05, "l2_leaf_reg": 3.0}
+SEARCH_SPACE = {
+    "depth": [4, 6, 8],
+    "learning_rate": [0.03, 0.05, 0.1],
+    "l2_leaf_reg": [1.0, 3.0, 10.0]
+}
+
+# Set per worker process by init_worker
+_worker_data = {}
+
+
+def load_training_data():
+    df = load_dataset()
+
+    # Drop rows with missing target or essential info
+    df = df.dropna(subset=["position"])
+
+    # Convert target to binary (1 = podium, 0 = not podium)
+    df["podium"] = (df["position"] <= 3).astype(int)
+    return df
+
+
+def race_order(df):
+    return df["year"].astype(int) * 100 + df["round"].astype(int)
+
+
+def write_training_state(train_df, path=STATE_PATH, **extra):
+    # Latest race the saved model has been trained on, read by update_model.py
+    last = train_df.loc[race_order(train_df).idxmax()]
+    state = {"trained_through": {"year": int(last["year"]), "round": int(last["round"])}, **extra}
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+    return state
+
+
+def season_forward_folds(years, n_folds):
+    # Rolling origin: fit on every season before the validation season but the last one,
+    # which is only used for early stopping so the validation season stays unseen
+    seasons = sorted(np.unique(years))
+    folds = []
+    for valid_year in seasons[-n_folds:]:
+        stop_year = max((season for season in seasons if season < valid_year), default=None)
+        if stop_year is None:
+            continue
+        fit_idx = np.flatnonzero(years < stop_year)
+        stop_idx = np.flatnonzero(years == stop_year)
+        valid_idx = np.flatnonzero(years == valid_year)
+        if len(fit_idx) and len(valid_idx):
+            folds.append((int(valid_year), fit_idx, stop_idx, valid_idx))
+    return folds
+
+
+def make_model(params, iterations, thread_count, verbose=False, write_files=False, early_stopping_rounds=50):
+    return CatBoostClassifier(
+        iterations=iterations,
+        loss_function="Logloss",
+        eval_metric="AUC",
+        early_stopping_rounds=early_stopping_rounds,
+        thread_count=thread_count,
+        random_seed=42,
+        verbose=verbose,
+        allow_writing_files=write_files,
+        **params
+    )
+
+
+def init_worker(X, y, thread_count):
+    _worker_data["X"] = X
+    _worker_data["y"] = y
+    _worker_data["thread_count"] = thread_count
+
+
+def run_fold(trial_id, params, valid_year, fit_idx, stop_idx, valid_idx, iterations):
+    X, y = _worker_data["X"], _worker_data["y"]
+    started = time.perf_counter()
+    model = make_model(params, iterations, _worker_data["thread_count"])
+    model.fit(
+        Pool(X.iloc[fit_idx], y.iloc[fit_idx]),
+        eval_set=Pool(X.iloc[stop_idx], y.iloc[stop_idx])
+    )
+    proba = model.predict_proba(X.iloc[valid_idx])[:, 1]
+    y_valid = y.iloc[valid_idx]
+    return {
+        "trial": trial_id,
+        **params,
+        "valid_year": valid_year,
+        "auc": roc_auc_score(y_valid, proba) if y_valid.nunique() > 1 else np.nan,
+        "logloss": log_loss(y_valid, proba, labels=[0, 1]),
+        "accuracy": accuracy_score(y_valid, proba >= 0.5),
+        "best_iteration": model.get_best_iteration(),
+        "seconds": time.perf_counter() - started
+    }
+
+
+def run_trials(df, trials, n_folds, iterations, workers, threads_per_worker):
+    X, y = df[MODEL_FEATURES], df["podium"]
+    folds = season_forward_folds(df["year"].to_numpy(), n_folds)
+    jobs = [
+        (trial_id, params, valid_year, fit_idx, stop_idx, valid_idx, iterations)
+        for trial_id, params in enumerate(trials)
+        for valid_year, fit_idx, stop_idx, valid_idx in folds
+    ]
+    print(f"🔁 {len(trials)} trials x {len(folds)} folds on {workers} workers x {threads_per_worker} threads")
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(X, y, threads_per_worker)) as executor:
+        futures = [executor.submit(run_fold, *job) for job in jobs]
+        for i, future in enumerate(as_completed(futures), start=1):
+            result = future.result()
+            results.append(result)
+            print(f"  [{i}/{len(jobs)}] trial {result['trial']} fold {result['valid_year']}: AUC {result['auc']:.4f}")
+
+    fold_results = pd.DataFrame(results)
+    param_cols = list(trials[0].keys())
+    leaderboard = (
+        fold_results.groupby(["trial"] + param_cols)
+        .agg(mean_auc=("auc", "mean"), std_auc=("auc", "std"), mean_logloss=("logloss", "mean"),
+             mean_accuracy=("accuracy", "mean"), mean_best_iteration=("best_iteration", "mean"),
+             folds=("valid_year", "count"), seconds=("seconds", "sum"))
+        .reset_index()
+        .sort_values("mean_auc", ascending=False)
+    )
+    return leaderboard, fold_results
+
+
+def train_final(df, params, iterations, thread_count, shap_plot=False):
+    # Holdout evaluation: early stop on the season before the latest one, report on the latest,
+    # which the evaluated model never sees
+    seasons = sorted(df["year"].unique())
+    last_year, stop_year = seasons[-1], seasons[-2]
+    fit_df, stop_df, test_df = df[df["year"] < stop_year], df[df["year"] == stop_year], df[df["year"] == last_year]
+    X_test, y_test = test_df[MODEL_FEATURES], test_df["podium"]
+
+    evaluator = make_model(params, iterations, thread_count, verbose=100)
+    evaluator.fit(Pool(fit_df[MODEL_FEATURES], fit_df["podium"]),
+                  eval_set=Pool(stop_df[MODEL_FEATURES], stop_df["podium"]))
+
+    proba = evaluator.predict_proba(X_test)[:, 1]
+    y_pred = (proba >= 0.5).astype(int)
+    print(f"\n🔍 Classification Report ({last_year} holdout):")
+    print(classification_report(y_test, y_pred))
+    print("✅ Accuracy:", accuracy_score(y_test, y_pred))
+    print(f"📈 AUC: {roc_auc_score(y_test, proba):.4f}  Log loss: {log_loss(y_test, proba, labels=[0, 1]):.4f}")
+    print("📉 Confusion Matrix:")
+    print(confusion_matrix(y_test, y_pred))
+
+    # The shipped model is refit on every season, the latest included, with the tree count found above
+    tree_count = evaluator.tree_count_
+    print(f"\n🚂 Refitting on all seasons with {tree_count} trees")
+    model = make_model(params, tree_count, thread_count, verbose=100, write_files=True, early_stopping_rounds=None)
+    model.fit(Pool(df[MODEL_FEATURES], df["podium"]))
+
+    os.makedirs(MODELS_DIR, exist_ok=True)
+
+    # Save as CatBoost binary model
+    model.save_model(os.path.join(MODELS_DIR, "catboost_podium_model.cbm"))
+
+    # Optionally, save as joblib for use with joblib.load()
+    joblib.dump(model, os.path.join(MODELS_DIR, "catboost_podium_model.pkl"))
+
+    # NumPy export used by the serving processes
+    export_model(os.path.join(MODELS_DIR, "catboost_podium_model.cbm"),
+                 os.path.join(MODELS_DIR, "catboost_podium_model.npz"))
+
+    write_training_state(df, mode="full", iterations=model.tree_count_, holdout_year=int(last_year))
+    print("✅ Model saved to models/ directory")
+
+    if shap_plot:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        import shap
+
+        shap_values = shap.Explainer(model)(X_test)
+        shap.summary_plot(shap_values, X_test, show=False)
+        plot_path = os.path.join(MODELS_DIR, "shap_summary.png")
+        plt.savefig(plot_path, bbox_inches="tight")
+        plt.close()
+        print(f"📊 SHAP summary plot saved to {plot_path}")
+
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the CatBoost podium model")
+    parser.add_argument("--search", action="store_true", help="grid search depth, learning rate and L2 with season-forward CV")
+    parser.add_argument("--cv", action="store_true", help="cross-validate the default parameters only")
+    parser.add_argument("--folds", type=int, default=5, help="number of most recent seasons used as validation folds")
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: cores / threads per worker)")
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--leaderboard", default=os.path.join(MODELS_DIR, "leaderboard.csv"))
+    parser.add_argument("--no-train", action="store_true", help="skip training the final model")
+    parser.add_argument("--shap", action="store_true", help="save a SHAP summary plot for the holdout season")
+    args = parser.parse_args()
+
+    df = load_training_data()
+    cores = os.cpu_count() or 1
+    workers = args.workers or max(1, cores // args.threads_per_worker)
+    params = dict(DEFAULT_PARAMS)
+
+    if args.search or args.cv:
+        if args.search:
+            keys = list(SEARCH_SPACE)
+            trials = [dict(zip(keys, values)) for values in itertools.product(*SEARCH_SPACE.values())]
+        else:
+            trials = [dict(DEFAULT_PARAMS)]
+
+        leaderboard, fold_results = run_trials(df, trials, args.folds, args.iterations, workers, args.threads_per_worker)
+        os.makedirs(os.path.dirname(args.leaderboard) or ".", exist_ok=True)
+        leaderboard.to_csv(args.leaderboard, index=False)
+        fold_results.to_csv(args.leaderboard.replace(".csv", "_folds.csv"), index=False)
+        print(f"\n🏆 Leaderboard saved to {args.leaderboard}")
+        print(leaderboard.head(10).to_string(index=False))
+
+        best = leaderboard.iloc[0]
+        params = {key: best[key] for key in trials[0]}
+        params["depth"] = int(params["depth"])
+
+    if not args.no_train:
+        print(f"\n🚂 Training final model with {params}")
+        train_final(df, params, args.iterations, cores, shap_plot=args.shap)
+
+
+if __name__ == "__main__":
+    main()
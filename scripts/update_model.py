@@ -0,0 +1,136 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+from catboost import CatBoostClassifier, Pool
+from sklearn.metrics import accuracy_score, roc_auc_score, log_loss
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(SCRIPT_DIR))
+from dataset_store import MODEL_FEATURES
+from tree_model import CBM_PATH, NPZ_PATH, PKL_PATH, export_model
+from train_model import MODELS_DIR, STATE_PATH, load_training_data, race_order, write_training_state
+
+
+def load_state(path=STATE_PATH):
+    # Without the state there is no telling which rounds the model has already seen,
+    # so validating it would risk scoring it on its own training data
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No training state at {path}. Retrain with `python scripts/train_model.py` first.")
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def split_update(df, trained_through, valid_rounds):
+    """New rounds to boost on, and a window of the most recent rounds to validate on.
+
+    The validation window is never trained on; its rounds become training data
+    once newer rounds push them out of the window.
+    """
+    order = race_order(df)
+    window = np.sort(order.unique())[-valid_rounds:]
+    valid = order.isin(window)
+    seen = trained_through["year"] * 100 + trained_through["round"]
+    return df[(order > seen) & ~valid], df[valid]
+
+
+def evaluate(model, valid_df):
+    proba = model.predict_proba(valid_df[MODEL_FEATURES])[:, 1]
+    y = valid_df["podium"]
+    return {
+        "auc": roc_auc_score(y, proba) if y.nunique() > 1 else float("nan"),
+        "logloss": log_loss(y, proba, labels=[0, 1]),
+        "accuracy": accuracy_score(y, proba >= 0.5)
+    }
+
+
+def regressed(candidate, current, tolerance):
+    if np.isnan(candidate["auc"]) or np.isnan(current["auc"]):
+        return candidate["logloss"] > current["logloss"] + tolerance
+    return candidate["auc"] < current["auc"] - tolerance or candidate["logloss"] > current["logloss"] + tolerance
+
+
+def promote(model, models_dir=MODELS_DIR):
+    # Write every artifact next to its target first, then swap each one in with os.replace.
+    # Running servers keep the model they already loaded; new loads see complete files only.
+    staging = tempfile.mkdtemp(prefix=".update-", dir=models_dir)
+    try:
+        cbm_tmp = os.path.join(staging, "model.cbm")
+        pkl_tmp = os.path.join(staging, "model.pkl")
+        npz_tmp = os.path.join(staging, "model.npz")
+        model.save_model(cbm_tmp)
+        joblib.dump(model, pkl_tmp)
+        export_model(cbm_tmp, npz_tmp)
+        for tmp_path, path in ((cbm_tmp, CBM_PATH), (pkl_tmp, PKL_PATH), (npz_tmp, NPZ_PATH)):
+            os.replace(tmp_path, path)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Continue boosting the saved model on newly added rounds")
+    parser.add_argument("--iterations", type=int, default=50, help="extra trees to add")
+    parser.add_argument("--learning-rate", type=float, default=0.03)
+    parser.add_argument("--valid-rounds", type=int, default=5, help="most recent rounds held out for validation")
+    parser.add_argument("--tolerance", type=float, default=0.001, help="allowed AUC drop / logloss rise before rejecting")
+    parser.add_argument("--dry-run", action="store_true", help="evaluate the candidate without promoting it")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    try:
+        state = load_state()
+    except FileNotFoundError as e:
+        raise SystemExit(f"❌ {e}")
+    df = load_training_data()
+    new_df, valid_df = split_update(df, state["trained_through"], args.valid_rounds)
+    through = state["trained_through"]
+    if new_df.empty:
+        print(f"✅ No new rounds after {through['year']} round {through['round']} outside the validation window")
+        return
+
+    current = CatBoostClassifier()
+    current.load_model(CBM_PATH)
+    params = current.get_all_params()
+    print(f"🔄 Boosting on {len(new_df)} rows from {race_order(new_df).nunique()} new rounds, "
+          f"validating on the last {args.valid_rounds} rounds ({len(valid_df)} rows)")
+
+    candidate = CatBoostClassifier(
+        iterations=args.iterations,
+        learning_rate=args.learning_rate,
+        depth=params.get("depth", 6),
+        l2_leaf_reg=params.get("l2_leaf_reg", 3.0),
+        loss_function="Logloss",
+        random_seed=42,
+        verbose=False,
+        allow_writing_files=False
+    )
+    # A fixed tree budget: the validation window is only touched by the final comparison,
+    # so early stopping on it cannot tilt the promotion gate towards the candidate
+    candidate.fit(Pool(new_df[MODEL_FEATURES], new_df["podium"]), init_model=current)
+
+    before, after = evaluate(current, valid_df), evaluate(candidate, valid_df)
+    print(f"\n{'metric':<10}{'current':>10}{'candidate':>12}")
+    for name in before:
+        print(f"{name:<10}{before[name]:>10.5f}{after[name]:>12.5f}")
+    print(f"🌲 Trees: {current.tree_count_} -> {candidate.tree_count_}")
+
+    if regressed(after, before, args.tolerance):
+        print("❌ Candidate regressed on the validation window, keeping the current model")
+        sys.exit(1)
+    if args.dry_run:
+        print("⚠️ Dry run, current model left in place")
+        return
+
+    promote(candidate)
+    write_training_state(new_df, mode="warm_start", iterations=candidate.tree_count_, validation=after)
+    print(f"✅ Promoted updated model in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from dataset_store import MODEL_FEATURES, load_dataset
+from tree_model import load_serving_model
+
+# Current scoring for the top ten; older seasons are re-scored with it too
+POINTS = np.array([25, 18, 15, 12, 10, 8, 6, 4, 2, 1], dtype=np.float32)
+
+
+def season_matrices(model, season_df, from_round=1):
+    """Lays the season out as (round, driver) arrays for the simulator."""
+    season_df = season_df.copy()
+    season_df["driver"] = season_df["driver"].astype(str)
+    season_df["constructor"] = season_df["constructor"].astype(str)
+
+    rounds = sorted(season_df["round"].unique())
+    drivers = sorted(season_df["driver"].unique())
+    constructors = sorted(season_df["constructor"].unique())
+
+    round_idx = season_df["round"].map({r: i for i, r in enumerate(rounds)}).to_numpy()
+    driver_idx = season_df["driver"].map({d: i for i, d in enumerate(drivers)}).to_numpy()
+    constructor_idx = season_df["constructor"].map({c: i for i, c in enumerate(constructors)}).to_numpy()
+
+    shape = (len(rounds), len(drivers))
+    proba = np.zeros(shape, dtype=np.float32)
+    proba[round_idx, driver_idx] = model.predict_proba(season_df[MODEL_FEATURES])[:, 1]
+    entered = np.zeros(shape, dtype=bool)
+    entered[round_idx, driver_idx] = True
+    team = np.zeros((len(rounds), len(drivers), len(constructors)), dtype=np.float32)
+    team[round_idx, driver_idx, constructor_idx] = 1
+
+    # Rounds before from_round keep their real results
+    finish = season_df["position"].to_numpy(dtype=float, na_value=np.nan)
+    actual = np.zeros(shape, dtype=np.float32)
+    scored = ~np.isnan(finish) & (finish <= len(POINTS))
+    actual[round_idx[scored], driver_idx[scored]] = POINTS[finish[scored].astype(int) - 1]
+    simulated = np.array([r >= from_round for r in rounds])
+    actual[simulated] = 0
+
+    return {
+        "rounds": rounds,
+        "drivers": drivers,
+        "constructors": constructors,
+        "proba": proba,
+        "entered": entered,
+        "team": team,
+        "actual_points": actual,
+        "simulated": simulated
+    }
+
+
+def simulate_season(proba, entered, team, actual_points, simulated, n_sims=100_000,
+                    chunk_size=10_000, seed=None):
+    """Samples finishing orders for every simulated round in bulk.
+
+    Orders are drawn from a Plackett-Luce model whose weights are the podium
+    odds, using the Gumbel-max trick, so a whole chunk of seasons is one argsort.
+    """
+    rng = np.random.default_rng(seed)
+    n_rounds, n_drivers = proba.shape
+    n_constructors = team.shape[2]
+
+    p = np.clip(proba[simulated], 1e-6, 1 - 1e-6)
+    log_weights = np.where(entered[simulated], np.log(p / (1 - p)), -np.inf).astype(np.float32)
+    team_sim = team[simulated]
+    base_points = actual_points.sum(axis=0)
+    base_team_points = np.einsum("rd,rdc->c", actual_points, team)
+
+    n_top = min(len(POINTS), n_drivers)
+    champion = np.zeros(n_drivers, dtype=np.int64)
+    team_champion = np.zeros(n_constructors, dtype=np.int64)
+    podiums = np.zeros((int(simulated.sum()), n_drivers), dtype=np.int64)
+    total_points = np.zeros(n_drivers, dtype=np.float64)
+    total_team_points = np.zeros(n_constructors, dtype=np.float64)
+
+    for start in range(0, n_sims, chunk_size):
+        size = min(chunk_size, n_sims - start)
+        gumbel = rng.gumbel(size=(size,) + log_weights.shape).astype(np.float32)
+        order = np.argsort(-(log_weights + gumbel), axis=-1)[..., :n_top]
+
+        points = np.zeros((size,) + log_weights.shape, dtype=np.float32)
+        np.put_along_axis(points, order, POINTS[:n_top], axis=-1)
+        points *= entered[simulated]
+
+        on_podium = np.zeros(points.shape, dtype=bool)
+        np.put_along_axis(on_podium, order[..., :3], True, axis=-1)
+        podiums += (on_podium & entered[simulated]).sum(axis=0)
+
+        season_points = points.sum(axis=1) + base_points
+        team_points = np.einsum("srd,rdc->sc", points, team_sim) + base_team_points
+        total_points += season_points.sum(axis=0)
+        total_team_points += team_points.sum(axis=0)
+
+        # Tiny noise breaks ties between equal points totals at random
+        champion += np.bincount(np.argmax(season_points + rng.random(season_points.shape) * 1e-3, axis=1),
+                                minlength=n_drivers)
+        team_champion += np.bincount(np.argmax(team_points + rng.random(team_points.shape) * 1e-3, axis=1),
+                                     minlength=n_constructors)
+
+    return {
+        "champion": champion / n_sims,
+        "constructor_champion": team_champion / n_sims,
+        "expected_points": total_points / n_sims,
+        "constructor_expected_points": total_team_points / n_sims,
+        "race_podium": podiums / n_sims
+    }
+
+
+def simulate_championship(model, dataset, year, from_round=1, n_sims=100_000, seed=None):
+    season_df = dataset[dataset["year"] == year]
+    if season_df.empty:
+        raise ValueError(f"No race data for {year}")
+
+    m = season_matrices(model, season_df, from_round)
+    result = simulate_season(m["proba"], m["entered"], m["team"], m["actual_points"], m["simulated"],
+                             n_sims=n_sims, seed=seed)
+
+    sim_rounds = [r for r, s in zip(m["rounds"], m["simulated"]) if s]
+    driver_table = pd.DataFrame({
+        "driver": m["drivers"],
+        "championship_probability": result["champion"],
+        "expected_points": result["expected_points"],
+        "expected_podiums": result["race_podium"].sum(axis=0)
+    })
+    podium_table = pd.DataFrame(result["race_podium"].T, columns=[f"round_{r}" for r in sim_rounds])
+    driver_table = pd.concat([driver_table, podium_table], axis=1)
+    driver_table = driver_table.sort_values(["championship_probability", "expected_points"], ascending=False)
+
+    team_sim = m["team"][m["simulated"]]
+    constructor_table = pd.DataFrame({
+        "constructor": m["constructors"],
+        "championship_probability": result["constructor_champion"],
+        "expected_points": result["constructor_expected_points"],
+        "expected_podiums": np.einsum("rd,rdc->c", result["race_podium"], team_sim)
+    }).sort_values(["championship_probability", "expected_points"], ascending=False)
+
+    return driver_table.reset_index(drop=True), constructor_table.reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo championship simulator")
+    parser.add_argument("year", type=int)
+    parser.add_argument("--from-round", type=int, default=1, help="first round to simulate; earlier rounds use real results")
+    parser.add_argument("--sims", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--out", default=None, help="prefix for driver/constructor CSV output")
+    args = parser.parse_args()
+
+    model = load_serving_model()
+    dataset = load_dataset(years=[args.year])
+
+    started = time.perf_counter()
+    drivers, constructors = simulate_championship(model, dataset, args.year, args.from_round, args.sims, args.seed)
+    print(f"🏁 Simulated {args.sims:,} seasons in {time.perf_counter() - started:.2f}s")
+
+    print("\nDrivers' championship:")
+    print(drivers[["driver", "championship_probability", "expected_points", "expected_podiums"]].head(10).to_string(index=False))
+    print("\nConstructors' championship:")
+    print(constructors.head(10).to_string(index=False))
+
+    if args.out:
+        drivers.to_csv(f"{args.out}_drivers.csv", index=False)
+        constructors.to_csv(f"{args.out}_constructors.csv", index=False)
+        print(f"\n✅ Saved tables with prefix {args.out}")
+
+
+if __name__ == "__main__":
+    main()
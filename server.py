@@ -0,0 +1,165 @@
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+import pandas as pd
+
+from dataset_store import ROOT_DIR, MODEL_FEATURES, load_dataset, build_race_index
+from tree_model import load_serving_model
+
+FRONTEND_DIR = os.path.join(ROOT_DIR, "frontend")
+
+
+class MicroBatcher:
+    """Merges concurrent scoring requests into one predict_proba call.
+
+    The worker waits at most ``max_wait_ms`` after the first request arrives,
+    or until ``max_batch_rows`` rows are queued, then scores everything at once.
+    """
+
+    def __init__(self, model, max_batch_rows=2000, max_wait_ms=5):
+        self.model = model
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, X):
+        future = Future()
+        self._queue.put((X, future))
+        return future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        rows = len(batch[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while rows < self.max_batch_rows:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                X = pd.concat([X for X, _ in batch], ignore_index=True)
+                proba = self.model.predict_proba(X)[:, 1]
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            offset = 0
+            for X, future in batch:
+                future.set_result((proba[offset:offset + len(X)], len(batch)))
+                offset += len(X)
+
+
+class PredictionService:
+    def __init__(self, **batch_options):
+        self.dataset = load_dataset()
+        self.rounds_by_year, self.race_slices = build_race_index(self.dataset)
+        self.features = self.dataset[MODEL_FEATURES]
+        self.batcher = MicroBatcher(load_serving_model(), **batch_options)
+
+    def predict(self, year, round_num):
+        race_slice = self.race_slices.get((year, round_num))
+        if race_slice is None:
+            return None
+
+        proba, batch_size = self.batcher.submit(self.features.iloc[race_slice]).result()
+        race = self.dataset.iloc[race_slice]
+        top3 = np.argsort(-proba, kind="stable")[:3]
+        return {
+            "year": year,
+            "round": round_num,
+            "circuit": str(race['circuit'].iloc[0]),
+            "podium": [
+                {
+                    "driver": str(race['driver'].iloc[i]),
+                    "constructor": str(race['constructor'].iloc[i]),
+                    "probability": round(float(proba[i]), 4)
+                }
+                for i in top3
+            ],
+            "batch_size": batch_size
+        }
+
+
+def make_handler(service):
+    class PredictionHandler(SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=FRONTEND_DIR, **kwargs)
+
+        def send_json(self, status, payload, started):
+            payload["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/predict":
+                return super().do_GET()
+
+            started = time.perf_counter()
+            params = parse_qs(url.query)
+            try:
+                year = int(params["year"][0])
+                round_num = int(params["round"][0])
+            except (KeyError, ValueError):
+                return self.send_json(400, {"error": "year and round must be integers"}, started)
+
+            try:
+                result = service.predict(year, round_num)
+            except Exception as e:
+                return self.send_json(500, {"error": str(e)}, started)
+
+            if result is None:
+                return self.send_json(404, {"error": f"No race data for {year} round {round_num}"}, started)
+            self.send_json(200, result, started)
+
+        def log_message(self, format, *args):
+            pass
+
+    return PredictionHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve podium predictions and the static frontend")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-wait-ms", type=float, default=5)
+    parser.add_argument("--max-batch-rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    service = PredictionService(max_batch_rows=args.max_batch_rows, max_wait_ms=args.max_wait_ms)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    print(f"🚦 Serving predictions on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
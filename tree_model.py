@@ -0,0 +1,142 @@
+import argparse
+import json
+import os
+import tempfile
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(ROOT_DIR, "scripts", "models")
+CBM_PATH = os.path.join(MODELS_DIR, "catboost_podium_model.cbm")
+NPZ_PATH = os.path.join(MODELS_DIR, "catboost_podium_model.npz")
+PKL_PATH = os.path.join(MODELS_DIR, "catboost_podium_model.pkl")
+
+
+def export_model(cbm_path=CBM_PATH, out_path=NPZ_PATH):
+    """Converts a CatBoost binary model into flat arrays of oblivious trees."""
+    from catboost import CatBoostClassifier
+
+    model = CatBoostClassifier()
+    model.load_model(cbm_path)
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "model.json")
+        model.save_model(json_path, format="json")
+        with open(json_path, "r", encoding="utf-8") as f:
+            spec = json.load(f)
+
+    features = spec["features_info"]["float_features"]
+    if spec["features_info"].get("categorical_features"):
+        raise ValueError("Categorical features are not supported by the NumPy evaluator")
+
+    trees = spec["oblivious_trees"]
+    depth = max(len(tree["splits"]) for tree in trees)
+    split_features = np.zeros((len(trees), depth), dtype=np.int32)
+    # Padded levels compare against +inf, which is never exceeded
+    borders = np.full((len(trees), depth), np.inf, dtype=np.float32)
+    leaf_values = np.zeros((len(trees), 2 ** depth), dtype=np.float64)
+    for t, tree in enumerate(trees):
+        for level, split in enumerate(tree["splits"]):
+            if split["split_type"] != "FloatFeature":
+                raise ValueError(f"Unsupported split type {split['split_type']}")
+            split_features[t, level] = split["float_feature_index"]
+            borders[t, level] = split["border"]
+        values = tree["leaf_values"]
+        leaf_values[t, :len(values)] = values
+
+    scale, bias = spec["scale_and_bias"]
+    np.savez_compressed(
+        out_path,
+        feature_names=np.array([f["feature_id"] for f in features]),
+        nan_as_max=np.array([f.get("nan_value_treatment") == "AsTrue" for f in features]),
+        split_features=split_features,
+        borders=borders,
+        leaf_values=leaf_values,
+        scale=np.float64(scale),
+        bias=np.float64(bias[0] if isinstance(bias, list) else bias)
+    )
+    return out_path
+
+
+class ObliviousTreeModel:
+    """Pure-NumPy evaluator for exported CatBoost oblivious trees.
+
+    Leaf indices are built from vectorized border comparisons, one bit per
+    tree level, so a batch of rows is scored without any Python loops over
+    trees.
+    """
+
+    def __init__(self, feature_names, nan_as_max, split_features, borders, leaf_values, scale, bias):
+        self.feature_names_ = [str(name) for name in feature_names]
+        self.nan_as_max = np.asarray(nan_as_max, dtype=bool)
+        self.split_features = split_features
+        self.borders = borders
+        self.leaf_values = leaf_values
+        self.scale = float(scale)
+        self.bias = float(bias)
+        self._bit_weights = (1 << np.arange(borders.shape[1])).astype(np.int64)
+        self._tree_index = np.arange(borders.shape[0])
+
+    @classmethod
+    def load(cls, path=NPZ_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(**{key: data[key] for key in data.files})
+
+    def _to_matrix(self, X):
+        if hasattr(X, "columns"):
+            X = X[self.feature_names_].to_numpy(dtype=np.float32, na_value=np.nan)
+        X = np.asarray(X, dtype=np.float32)
+        if np.isnan(X).any():
+            # CatBoost's default NaN handling treats missing values as the minimum
+            X = np.where(np.isnan(X), np.where(self.nan_as_max, np.inf, -np.inf), X)
+        return X
+
+    def predict_raw(self, X, chunk_size=4096):
+        X = self._to_matrix(X)
+        raw = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), chunk_size):
+            chunk = X[start:start + chunk_size]
+            bits = chunk[:, self.split_features] > self.borders
+            leaves = bits.astype(np.int64) @ self._bit_weights
+            raw[start:start + chunk_size] = self.leaf_values[self._tree_index, leaves].sum(axis=1)
+        return self.scale * raw + self.bias
+
+    def predict_proba(self, X):
+        p = 1 / (1 + np.exp(-self.predict_raw(X)))
+        return np.column_stack([1 - p, p])
+
+    def predict(self, X):
+        return (self.predict_raw(X) > 0).astype(np.int64)
+
+
+def load_serving_model(npz_path=NPZ_PATH, pkl_path=PKL_PATH):
+    # Prefer the exported trees so serving never has to import catboost
+    if os.path.exists(npz_path):
+        return ObliviousTreeModel.load(npz_path)
+    import joblib
+    return joblib.load(pkl_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the CatBoost model for NumPy-only inference")
+    parser.add_argument("--cbm", default=CBM_PATH)
+    parser.add_argument("--out", default=NPZ_PATH)
+    parser.add_argument("--check", action="store_true", help="compare against catboost predict_proba on the dataset")
+    args = parser.parse_args()
+
+    path = export_model(args.cbm, args.out)
+    print(f"✅ Exported {args.cbm} to {path}")
+
+    if args.check:
+        from catboost import CatBoostClassifier
+        from dataset_store import load_dataset
+
+        reference = CatBoostClassifier()
+        reference.load_model(args.cbm)
+        model = ObliviousTreeModel.load(path)
+        X = load_dataset()[model.feature_names_]
+        diff = np.abs(reference.predict_proba(X) - model.predict_proba(X)).max()
+        print(f"🔍 Max abs difference vs catboost over {len(X)} rows: {diff:.3e}")
+
+
+if __name__ == "__main__":
+    main()